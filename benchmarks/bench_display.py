@@ -0,0 +1,63 @@
+"""Display CPU time per frame: new PIL image + PhotoImage per frame vs the reused FrameDisplay.
+
+    python benchmarks/bench_display.py --frames 300
+
+Needs a display (or Xvfb), since it drives a real Tk label.
+"""
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from display import FrameDisplay
+
+
+def legacy_show(label, frame):
+    # What every UI did before: convert, new Image, new PhotoImage, reconfigure the label
+    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    img = Image.fromarray(frame_rgb)
+    img_tk = ImageTk.PhotoImage(image=img)
+    label.img_tk = img_tk
+    label.config(image=img_tk)
+
+
+def measure(root, show, frames):
+    start = time.process_time()
+    for frame in frames:
+        show(frame)
+        root.update()
+    return (time.process_time() - start) / len(frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--size", default="640x480", help="frame size, WIDTHxHEIGHT")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+    rng = np.random.default_rng(0)
+    # A handful of distinct frames so every paste really changes the image
+    frames = [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(8)]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+
+    root = tk.Tk()
+    label = tk.Label(root)
+    label.pack()
+    legacy = measure(root, lambda frame: legacy_show(label, frame), frames)
+    display = FrameDisplay(label, max_fps=None)
+    reused = measure(root, display.show, frames)
+    root.destroy()
+
+    print(f"legacy        {legacy * 1e3:7.2f} ms CPU/frame")
+    print(f"FrameDisplay  {reused * 1e3:7.2f} ms CPU/frame  ({legacy / reused:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
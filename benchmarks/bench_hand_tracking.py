@@ -0,0 +1,72 @@
+"""Fingertip tracking fps on a recorded clip for full-frame, downscaled and keypad-ROI modes.
+
+    python benchmarks/bench_hand_tracking.py clip.mp4 --scales 1.0 0.5 --margins none 60
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hand_tracking import FingertipTracker
+from keypad import get_keypad
+
+# Keypad layout of virtualkeyboard.py
+KEYBOARD_KEYS = [["1", "2", "3"], ["4", "5", "6"], ["7", "8", "9"], ["0", "Delete", "Enter"]]
+KEY_WIDTH, KEY_HEIGHT, X_GAP, Y_GAP, PADDING = 100, 80, 30, 22, 15
+
+
+def read_clip(path, limit):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    cap.release()
+    return frames
+
+
+def run(frames, scale, margin):
+    import mediapipe as mp
+    # A fresh Hands instance per mode so tracking state does not carry over
+    with mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.9, min_tracking_confidence=0.9) as hands:
+        tracker = FingertipTracker(hands, scale, margin)
+        frame_size = (frames[0].shape[1], frames[0].shape[0])
+        box = get_keypad(KEYBOARD_KEYS, frame_size, KEY_WIDTH, KEY_HEIGHT, X_GAP, Y_GAP, PADDING).box
+        found = 0
+        start = time.perf_counter()
+        for frame in frames:
+            fingertip, _, _ = tracker.locate(frame, box)
+            found += fingertip is not None
+        elapsed = time.perf_counter() - start
+    return len(frames) / elapsed, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("clip", help="recorded video file")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.5])
+    parser.add_argument("--margins", nargs="+", default=["none", "60"], help="ROI margins in pixels, or none")
+    parser.add_argument("--max-frames", type=int, default=600)
+    args = parser.parse_args()
+
+    frames = read_clip(args.clip, args.max_frames)
+    if not frames:
+        sys.exit(f"No frames could be read from {args.clip}")
+    baseline = None
+    for scale, margin in itertools.product(args.scales, args.margins):
+        margin = None if margin == "none" else int(margin)
+        fps, found = run(frames, scale, margin)
+        if baseline is None:
+            baseline = fps
+        label = f"scale={scale:<4} roi_margin={margin}"
+        print(f"{label:28s} {fps:7.1f} fps  x{fps / baseline:4.2f}  fingertip found in {found}/{len(frames)} frames")
+
+
+if __name__ == "__main__":
+    main()
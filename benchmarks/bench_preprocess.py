@@ -0,0 +1,62 @@
+"""Per-frame time and allocated bytes of recognize_product preprocessing, before and after.
+
+    python benchmarks/bench_preprocess.py --frame-size 1280x720 --iterations 500
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing import Preprocessor
+
+
+def legacy_preprocess(frame):
+    # selfcheckoutmachine.py before the change; np.asarray(float32) is what img_to_array does
+    img = cv2.resize(frame, (150, 150))
+    img = img.astype("float") / 255.0
+    img = np.asarray(img, dtype="float32")
+    return np.expand_dims(img, axis=0)
+
+
+def legacy_two_step(frame):
+    # systemsintegration.py resized to the webcam size first
+    return legacy_preprocess(cv2.resize(frame, (640, 480)))
+
+
+def measure(fn, frame, iterations):
+    fn(frame)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(frame)
+    per_frame = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    fn(frame)
+    allocated = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return per_frame, allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frame-size", default="1280x720", help="camera frame size, WIDTHxHEIGHT")
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.frame_size.split("x"))
+    frame = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    preprocess = Preprocessor()
+    for name, fn in (("legacy", legacy_preprocess), ("legacy 640x480 first", legacy_two_step), ("preprocessor", preprocess)):
+        per_frame, allocated = measure(fn, frame, args.iterations)
+        print(f"{name:22s} {per_frame * 1e6:8.1f} us/frame {allocated:10d} bytes allocated/frame")
+
+
+if __name__ == "__main__":
+    main()
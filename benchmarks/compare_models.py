@@ -0,0 +1,84 @@
+"""Compare trained models on accuracy, file size, load time and single-frame CPU latency.
+
+    python benchmarks/compare_models.py self_checkout_model.h5 self_checkout_compact.h5 \
+        self_checkout_compact.int8.tflite --cache dataset_cache --num-classes 3
+
+Accuracy is measured on the test split of the dataset cache written by
+selfcheckoutmodel.py, so every model is scored on the same images.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset_cache import DatasetCache
+from inference import create_engine
+
+
+def accuracy(engine, cache, entries, num_classes, batch_size=32):
+    correct = 0
+    batches = cache.batches(entries, num_classes, batch_size, shuffle=False)
+    for _ in range(0, len(entries), batch_size):
+        x, y = next(batches)
+        for image, label in zip(x, y):
+            # One image at a time, the way recognize_product calls the model
+            correct += int(np.argmax(engine.predict(image[np.newaxis])[0]) == np.argmax(label))
+    return correct / len(entries)
+
+
+def latency(engine, iterations):
+    frame = np.random.default_rng(0).random((1, 150, 150, 3), dtype=np.float32)
+    for _ in range(5):
+        engine.predict(frame)
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        engine.predict(frame)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("models", nargs="+", help=".h5 or .tflite model files")
+    parser.add_argument("--backend", default="compiled", help="backend for .h5 models")
+    parser.add_argument("--threads", type=int, default=2, help="TFLite interpreter threads")
+    parser.add_argument("--cache", default="dataset_cache", help="dataset cache directory")
+    parser.add_argument("--num-classes", type=int, required=True)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    cache = DatasetCache(args.cache)
+    _, test_entries = cache.split(args.test_size)
+    results = []
+    for model_path in args.models:
+        backend = "tflite" if model_path.endswith(".tflite") else args.backend
+        start = time.perf_counter()
+        engine = create_engine(backend, model_path, args.threads)
+        load_time = time.perf_counter() - start
+        results.append({
+            "model": model_path,
+            "backend": backend,
+            "size_mb": os.path.getsize(model_path) / 1e6,
+            "load_s": load_time,
+            "latency_ms": latency(engine, args.iterations) * 1e3,
+            "accuracy": accuracy(engine, cache, test_entries, args.num_classes) if test_entries else None,
+        })
+
+    print(f"{'model':40s} {'backend':9s} {'size MB':>8s} {'load s':>7s} {'ms/frame':>9s} {'accuracy':>9s}")
+    for r in results:
+        acc = "n/a" if r["accuracy"] is None else f"{r['accuracy']:.3f}"
+        print(f"{r['model']:40s} {r['backend']:9s} {r['size_mb']:8.2f} {r['load_s']:7.2f} {r['latency_ms']:9.2f} {acc:>9s}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
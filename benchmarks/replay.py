@@ -0,0 +1,255 @@
+"""Replay recorded or synthetic frames through recognition and the gesture keypad, without a camera or display.
+
+    python benchmarks/replay.py --video clip.mp4 --model self_checkout_model.h5 --json results/replay.json
+    python benchmarks/replay.py --synthetic 600 --frame-size 1280x720 --skip-recognition
+
+Per frame this runs what the apps run: preprocessing, the model and the
+catalog lookup of recognize_product (behind the motion gate), then the
+keypad overlay, MediaPipe fingertip tracking and key hit test of the
+gesture keyboard. Reports p50/p95/p99 latency per stage, sustained fps over
+the whole run and peak RSS, and optionally saves them as JSON.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gesture_keyboard import KEYBOARD_KEYS
+from keypad import get_keypad
+from preprocessing import Preprocessor
+from recognition import MotionGate, Recognizer
+
+# Gesture keyboard layout and tracking settings of virtualkeyboard.py
+KEY_WIDTH, KEY_HEIGHT, X_GAP, Y_GAP, PADDING = 100, 80, 30, 22, 15
+CONFIDENCE_THRESHOLD = 0.92
+
+
+class Stages:
+    """Latency samples per named stage."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    @contextmanager
+    def time(self, name):
+        start = time.perf_counter()
+        yield
+        self.samples[name].append(time.perf_counter() - start)
+
+    def summary(self):
+        summary = {}
+        for name, samples in self.samples.items():
+            ms = np.array(samples) * 1e3
+            summary[name] = {
+                "count": len(ms),
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "p99_ms": float(np.percentile(ms, 99)),
+                "max_ms": float(ms.max()),
+            }
+        return summary
+
+
+def video_frames(path, limit):
+    cap = cv2.VideoCapture(path)
+    count = 0
+    while limit is None or count < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        count += 1
+        yield frame
+    cap.release()
+
+
+def synthetic_frames(count, frame_size, seed=0):
+    """A fixed noisy background with a square drifting across it, so the motion gate sees real changes."""
+    width, height = frame_size
+    rng = np.random.default_rng(seed)
+    background = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    side = min(width, height) // 4
+    for i in range(count):
+        frame = background.copy()
+        x = (i * 7) % (width - side)
+        y = (height - side) // 2
+        frame[y:y + side, x:x + side] = (40, 160, 220)
+        yield frame
+
+
+def peak_rss_mb():
+    """Peak resident memory in MB, or None where it cannot be read (Windows without psutil)."""
+    try:
+        import resource
+    except ImportError:
+        # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / (1 << 20)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def make_recognizer(args, stages):
+    from catalog import Catalog
+    from inference import load_engine
+
+    catalog = Catalog.open(args.catalog, args.model)
+    engine = load_engine(args.backend, args.model, args.threads)
+    preprocess = Preprocessor((150, 150))
+
+    def predict(frame):
+        with stages.time("preprocess"):
+            batch = preprocess(frame)
+        with stages.time("predict"):
+            return engine.predict(batch)[0]
+
+    gate = MotionGate(args.motion_threshold) if args.motion_threshold is not None else None
+    recognizer = Recognizer(predict, gate)
+
+    def recognize_product(frame):
+        prediction = recognizer(frame)
+        with stages.time("lookup"):
+            product_class = int(np.argmax(prediction))
+            if prediction[product_class] < CONFIDENCE_THRESHOLD:
+                return None
+            return catalog.product_for_class(product_class)
+
+    return recognize_product, recognizer
+
+
+def make_tracker(args):
+    import mediapipe as mp
+    from hand_tracking import FingertipTracker, PredictiveFingertipTracker
+
+    hands = mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.9, min_tracking_confidence=0.9)
+    margin = None if args.roi_margin == "none" else int(args.roi_margin)
+    tracker = FingertipTracker(hands, args.tracking_scale, margin)
+    if args.detection_interval > 1:
+        tracker = PredictiveFingertipTracker(tracker, args.detection_interval)
+    return tracker
+
+
+def replay(frames, args):
+    stages = Stages()
+    recognize_product = recognizer = tracker = None
+    if not args.skip_recognition:
+        recognize_product, recognizer = make_recognizer(args, stages)
+    if not args.skip_hands:
+        tracker = make_tracker(args)
+
+    count = 0
+    recognized = 0
+    fingertips = 0
+    frames = iter(frames)
+    start = time.perf_counter()
+    while True:
+        frame_start = time.perf_counter()
+        with stages.time("capture"):
+            frame = next(frames, None)
+        if frame is None:
+            break
+        count += 1
+        if recognize_product:
+            with stages.time("recognize"):
+                recognized += recognize_product(frame) is not None
+
+        frame_height, frame_width = frame.shape[:2]
+        keypad = get_keypad(KEYBOARD_KEYS, (frame_width, frame_height), KEY_WIDTH, KEY_HEIGHT, X_GAP, Y_GAP, PADDING)
+        with stages.time("convert"):
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        with stages.time("keypad_draw"):
+            keypad.draw(frame_rgb)
+        fingertip = None
+        if tracker:
+            with stages.time("hands"):
+                fingertip, _, _ = tracker.locate(frame_rgb, keypad.box)
+            fingertips += fingertip is not None
+        if fingertip is None:
+            # No hand in the clip: sweep a point over the keypad so hit testing is still exercised
+            x0, y0, x1, y1 = keypad.box
+            fingertip = (x0 + count * 13 % max(1, x1 - x0), y0 + count * 7 % max(1, y1 - y0))
+        with stages.time("hit_test"):
+            keypad.key_at(*fingertip)
+        stages.samples["frame"].append(time.perf_counter() - frame_start)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "frames": count,
+        "seconds": elapsed,
+        "fps": count / elapsed if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": stages.summary(),
+        "recognized_frames": recognized if recognize_product else None,
+        "fingertip_frames": fingertips if tracker else None,
+    }
+    if recognizer:
+        result["recognizer"] = recognizer.stats()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--video", help="recorded video file")
+    source.add_argument("--synthetic", type=int, metavar="N", help="generate N synthetic frames")
+    parser.add_argument("--frame-size", default="1280x720", help="synthetic frame size, WIDTHxHEIGHT")
+    parser.add_argument("--max-frames", type=int, help="stop after this many video frames")
+    parser.add_argument("--model", default="self_checkout_model.h5")
+    parser.add_argument("--catalog", default="ProductData.csv")
+    parser.add_argument("--backend", default="compiled", help="inference backend for .h5 models")
+    parser.add_argument("--threads", type=int, default=2, help="TFLite interpreter threads")
+    parser.add_argument("--motion-threshold", type=float, default=8.0, help="motion gate threshold; -1 disables gating")
+    parser.add_argument("--tracking-scale", type=float, default=0.5)
+    parser.add_argument("--roi-margin", default="60", help="keypad ROI margin in pixels, or none")
+    parser.add_argument("--detection-interval", type=int, default=3)
+    parser.add_argument("--skip-recognition", action="store_true", help="do not load the model")
+    parser.add_argument("--skip-hands", action="store_true", help="do not run MediaPipe")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+    if args.motion_threshold is not None and args.motion_threshold < 0:
+        args.motion_threshold = None
+
+    if args.video:
+        frames = video_frames(args.video, args.max_frames)
+    else:
+        width, height = (int(v) for v in args.frame_size.split("x"))
+        frames = synthetic_frames(args.synthetic, (width, height))
+    result = replay(frames, args)
+    if not result["frames"]:
+        sys.exit(f"No frames could be read from {args.video}")
+
+    peak = result["peak_rss_mb"]
+    print(f"{result['frames']} frames in {result['seconds']:.2f} s: {result['fps']:.1f} fps, "
+          f"peak RSS {'n/a' if peak is None else f'{peak:.0f} MB'}")
+    print(f"{'stage':12s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    for name, s in result["stages"].items():
+        print(f"{name:12s} {s['p50_ms']:8.2f} {s['p95_ms']:8.2f} {s['p99_ms']:8.2f} {s['max_ms']:8.2f}")
+    if "recognizer" in result:
+        print(f"recognizer: {result['recognizer']}")
+
+    if args.json:
+        result["run"] = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "args": vars(args),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
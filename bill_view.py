@@ -0,0 +1,124 @@
+import tkinter as tk
+from tkinter import ttk
+
+from cart import format_cents
+
+COLUMNS = (
+    ('product', 'Product'),
+    ('price', 'Price'),
+    ('quantity', 'Quantity'),
+    ('discount', 'Discount'),
+    ('discounted_price', 'Discounted Price'),
+    ('total', 'Total'),
+)
+
+
+def line_values(line):
+    return (
+        line.product['name'],
+        format_cents(line.unit_cents),
+        line.quantity,
+        f"{line.product['discount']*100:.0f}%",
+        format_cents(line.discounted_cents),
+        format_cents(line.total_cents),
+    )
+
+
+class BillView:
+    """Persistent bill window that only renders the cart lines currently in view.
+
+    The Treeview holds at most `visible_rows` items and scrolling changes which
+    cart lines they show, so opening or updating the bill costs the same for
+    five lines or fifty thousand. Rows are only rewritten when their values
+    change.
+    """
+
+    def __init__(self, master, cart, on_proceed, visible_rows=15):
+        self.master = master
+        self.cart = cart
+        self.on_proceed = on_proceed
+        self.visible_rows = visible_rows
+        self.window = None
+        self.offset = 0
+        self._rendered = []
+        cart.listeners.append(self.on_cart_changed)
+
+    def show(self):
+        if self.window is None:
+            self._build()
+        else:
+            self.window.deiconify()
+            self.window.lift()
+        self.refresh()
+
+    def hide(self):
+        self.window.withdraw()
+
+    def is_visible(self):
+        return self.window is not None and self.window.state() != 'withdrawn'
+
+    def _build(self):
+        self.window = tk.Toplevel(self.master)
+        self.window.title("Bill Summary")
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
+
+        bill_frame = ttk.Frame(self.window, padding="10")
+        bill_frame.pack(expand=True, fill=tk.BOTH)
+
+        table_frame = ttk.Frame(bill_frame)
+        table_frame.pack(expand=True, fill=tk.BOTH)
+        self.tree = ttk.Treeview(table_frame, columns=[name for name, _ in COLUMNS], show='headings',
+                                 height=self.visible_rows)
+        for name, heading in COLUMNS:
+            self.tree.heading(name, text=heading)
+        self.scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self._on_scroll)
+        self.tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind('<MouseWheel>', lambda event: self._scroll_by(-1 if event.delta > 0 else 1))
+        self.tree.bind('<Button-4>', lambda event: self._scroll_by(-1))
+        self.tree.bind('<Button-5>', lambda event: self._scroll_by(1))
+
+        self.total_label = ttk.Label(bill_frame, font=('Helvetica', 14, 'bold'))
+        self.total_label.pack(pady=10)
+
+        proceed_button = ttk.Button(bill_frame, text="Proceed to Payment", command=lambda: [self.hide(), self.on_proceed()])
+        proceed_button.pack(pady=10)
+
+    def on_cart_changed(self, sku):
+        # A hidden bill is brought up to date when it is shown again
+        if self.is_visible():
+            self.refresh()
+
+    def refresh(self):
+        line_count = self.cart.line_count
+        self.offset = max(0, min(self.offset, line_count - self.visible_rows))
+        shown = min(self.visible_rows, line_count - self.offset)
+        for slot in range(shown):
+            values = line_values(self.cart.line_at(self.offset + slot))
+            if slot == len(self._rendered):
+                self.tree.insert('', 'end', iid=f"row{slot}", values=values)
+                self._rendered.append(values)
+            elif self._rendered[slot] != values:
+                self.tree.item(f"row{slot}", values=values)
+                self._rendered[slot] = values
+        while len(self._rendered) > shown:
+            self._rendered.pop()
+            self.tree.delete(f"row{len(self._rendered)}")
+
+        if line_count:
+            self.scrollbar.set(self.offset / line_count, (self.offset + shown) / line_count)
+        else:
+            self.scrollbar.set(0, 1)
+        self.total_label.config(text=f"Total Price: {format_cents(self.cart.total_cents)}")
+
+    def _scroll_by(self, rows):
+        self.offset += rows
+        self.refresh()
+
+    def _on_scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.offset = int(float(amount) * self.cart.line_count)
+            self.refresh()
+        elif action == 'scroll':
+            step = self.visible_rows if unit == 'pages' else 1
+            self._scroll_by(int(amount) * step)
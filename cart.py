@@ -0,0 +1,117 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+
+def to_cents(amount):
+    """Convert a price or entered amount (number or string) to integer cents."""
+    try:
+        value = Decimal(str(amount).strip().replace('$', ''))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {amount!r}") from None
+    if not value.is_finite():
+        raise ValueError(f"Invalid amount: {amount!r}")
+    return int((value * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def format_cents(cents):
+    return f"${Decimal(cents) / 100:.2f}"
+
+
+class CartLine:
+    """Quantity and precomputed per-unit prices, in cents, for one SKU."""
+
+    def __init__(self, product):
+        self.product = product
+        self.quantity = 0
+        self.unit_cents = to_cents(product['price'])
+        discounted = Decimal(self.unit_cents) * (1 - Decimal(str(product['discount'])))
+        self.discounted_cents = int(discounted.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+    @property
+    def sku(self):
+        return self.product['sku']
+
+    @property
+    def total_cents(self):
+        return self.quantity * self.discounted_cents
+
+
+class Cart:
+    """Scanned items aggregated per SKU, with totals kept up to date on every change.
+
+    Callables in `listeners` are called with the SKU that changed (None when
+    the cart is cleared) after every change.
+    """
+
+    def __init__(self):
+        self._lines = {}
+        self._order = []
+        self._history = []
+        self.total_cents = 0
+        self.item_count = 0
+        self.listeners = []
+
+    def __len__(self):
+        return self.item_count
+
+    @property
+    def line_count(self):
+        return len(self._order)
+
+    def lines(self):
+        return list(self._lines.values())
+
+    def line(self, sku):
+        return self._lines.get(sku)
+
+    def line_at(self, index):
+        """The index-th line in scan order."""
+        return self._lines[self._order[index]]
+
+    def _notify(self, sku):
+        for listener in self.listeners:
+            listener(sku)
+
+    def add(self, product):
+        line = self._lines.get(product['sku'])
+        if line is None:
+            line = self._lines[product['sku']] = CartLine(product)
+            self._order.append(line.sku)
+        line.quantity += 1
+        self.total_cents += line.discounted_cents
+        self.item_count += 1
+        self._history.append(line.sku)
+        self._notify(line.sku)
+        return line
+
+    def remove(self, sku):
+        """Remove one unit of `sku`; returns the updated line, or None if it was not in the cart."""
+        line = self._lines.get(sku)
+        if line is None:
+            return None
+        line.quantity -= 1
+        self.total_cents -= line.discounted_cents
+        self.item_count -= 1
+        if line.quantity == 0:
+            del self._lines[sku]
+            self._order.remove(sku)
+        # Forget the most recent scan of this SKU so undo() does not remove it twice
+        for i in range(len(self._history) - 1, -1, -1):
+            if self._history[i] == sku:
+                del self._history[i]
+                break
+        self._notify(sku)
+        return line
+
+    def undo(self):
+        """Remove the most recently scanned item."""
+        if not self._history:
+            return None
+        return self.remove(self._history[-1])
+
+    def clear(self):
+        self._lines.clear()
+        self._order.clear()
+        self._history.clear()
+        self.total_cents = 0
+        self.item_count = 0
+        self._notify(None)
@@ -0,0 +1,112 @@
+import csv
+import json
+import os
+import sqlite3
+import threading
+
+
+def parse_price(text):
+    return float(text.replace('$', ''))
+
+
+def parse_discount(text):
+    return float(text.replace('%', '')) / 100.0
+
+
+def class_index_path(model_path):
+    return os.path.splitext(model_path)[0] + ".classes.json"
+
+
+def save_class_index(model_path, skus):
+    """Save the class index -> SKU array the model was trained with next to the model."""
+    with open(class_index_path(model_path), "w") as f:
+        json.dump([int(sku) for sku in skus], f)
+
+
+def load_class_index(model_path):
+    path = class_index_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_catalog(csv_path, db_path):
+    """Stream the product CSV into an SQLite catalog indexed by SKU."""
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    # rowid keeps the CSV row order, which older models without a class index rely on
+    conn.execute("CREATE TABLE products (sku INTEGER NOT NULL UNIQUE, name TEXT NOT NULL, "
+                 "price REAL NOT NULL, discount REAL NOT NULL)")
+    with open(csv_path, newline='') as f:
+        rows = ((int(row['Product_ID']), row['Product_Name'], parse_price(row['Price']),
+                 parse_discount(row['Discount'])) for row in csv.DictReader(f))
+        conn.executemany("INSERT INTO products VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, db_path)
+
+
+class Catalog:
+    """Product lookups by SKU or model class index, backed by a lazily opened SQLite file.
+
+    Only products that are actually looked up are loaded; each one is cached
+    after the first query, so repeat lookups are a dict hit.
+    """
+
+    def __init__(self, db_path, class_skus=None):
+        self.db_path = db_path
+        self.class_skus = class_skus
+        self._conn = None
+        self._lock = threading.Lock()
+        self._products = {}
+        self._by_class = {}
+
+    @classmethod
+    def open(cls, csv_path, model_path, db_path=None):
+        """Open the catalog for `model_path`, rebuilding it if the CSV is newer."""
+        if db_path is None:
+            db_path = os.path.splitext(csv_path)[0] + ".sqlite"
+        if not os.path.exists(db_path) or os.path.getmtime(csv_path) > os.path.getmtime(db_path):
+            build_catalog(csv_path, db_path)
+        class_skus = load_class_index(model_path)
+        if class_skus is None:
+            print(f"No class index found for {model_path}, assuming classes follow the CSV row order")
+        return cls(db_path, class_skus)
+
+    def _query(self, sql, params):
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            return self._conn.execute(sql, params).fetchone()
+
+    def get(self, sku):
+        if sku not in self._products:
+            row = self._query("SELECT sku, name, price, discount FROM products WHERE sku = ?", (sku,))
+            self._products[sku] = None if row is None else {
+                'sku': row[0],
+                'name': row[1],
+                'price': row[2],
+                'discount': row[3],
+            }
+        return self._products[sku]
+
+    def sku_for_class(self, class_index):
+        if self.class_skus is not None:
+            return self.class_skus[class_index]
+        row = self._query("SELECT sku FROM products WHERE rowid = ?", (class_index + 1,))
+        return None if row is None else row[0]
+
+    def product_for_class(self, class_index):
+        if class_index not in self._by_class:
+            sku = self.sku_for_class(class_index)
+            self._by_class[class_index] = None if sku is None else self.get(sku)
+        return self._by_class[class_index]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,221 @@
+import queue
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from cart import Cart, to_cents
+from detection import Detection
+from metrics import NULL_METRICS
+from preprocessing import Preprocessor
+from recognition import MotionGate, Recognizer
+
+Bill = namedtuple("Bill", "lines item_count total_cents")
+Payment = namedtuple("Payment", "paid amount_cents total_cents change_cents")
+
+
+class CheckoutEngine:
+    """One checkout lane with no GUI: recognition, cart and payment.
+
+    feed_frame() runs recognition on a camera frame and remembers the
+    product in view, scan() adds it to the cart, bill() and pay() settle the
+    cart and reset() starts the next customer. Front ends only draw what
+    these return. `inference` is an engine from inference.py and may be
+    shared between lanes (see create_lanes()); each lane has its own cart,
+    motion gate and preprocessing buffer. Preprocessing and prediction
+    times go to `metrics`.
+
+    `inference` and `catalog` may be None while they load in the background;
+    the cart works in the meantime and feed_frame() recognizes nothing until
+    both are set.
+
+    With a `detector` (detection.ItemDetector) every frame is searched for
+    several items, all crops are classified in one batched predict call, and
+    scan_all() adds every item in view.
+
+    With a `voter` (recognition.TemporalVoter) a single item is only
+    recognized once it dominates several recent frames. `auto_scan` then
+    queues each newly confirmed product once per presentation; the cart only
+    changes when apply_auto_scans() is called, so front ends can do that on
+    their own UI thread.
+
+    With a `low_confidence` store (retraining_store.LowConfidenceStore)
+    freshly predicted frames, or item crops, that fall below the confidence
+    threshold are offered to it for retraining.
+    """
+
+    def __init__(self, inference, catalog, motion_threshold=8.0, confidence_threshold=0.92, lock=None,
+                 metrics=None, detector=None, voter=None, auto_scan=False, low_confidence=None):
+        self.inference = inference
+        self.metrics = metrics or NULL_METRICS
+        self.catalog = catalog
+        self.confidence_threshold = confidence_threshold
+        self.lock = lock
+        self.preprocess = Preprocessor((150, 150))
+        self.detector = detector
+        gate = MotionGate(motion_threshold) if motion_threshold is not None else None
+        # The recognizer caches whatever it wraps while the scene is static: one prediction, or the detections
+        self.recognizer = Recognizer(self.detect_items if detector else self.predict, gate)
+        self.voter = voter
+        self.auto_scan = auto_scan
+        self.auto_scans = queue.Queue()
+        self.low_confidence = low_confidence
+        self.cart = Cart()
+        self.current_product = None
+        self.current_items = []
+        # (width, height) of the frame the current_items boxes refer to
+        self.items_frame_size = None
+        self.last_payment = None
+
+    @property
+    def ready(self):
+        return self.inference is not None and self.catalog is not None
+
+    def predict(self, frame):
+        with self.metrics.time("preprocess"):
+            batch = self.preprocess(frame)
+        with self.metrics.time("predict"):
+            if self.lock is None:
+                prediction = self.inference.predict(batch)[0]
+            else:
+                with self.lock:
+                    prediction = self.inference.predict(batch)[0]
+        self._keep_if_unsure(frame, prediction)
+        return prediction
+
+    def _keep_if_unsure(self, frame, prediction):
+        if self.low_confidence is not None and np.max(prediction) < self.confidence_threshold:
+            self.low_confidence.offer(frame, prediction, self.catalog.sku_for_class)
+
+    def detect_items(self, frame):
+        """Detections for every candidate region in `frame` classified above the confidence threshold.
+
+        Classes with no catalog product are left out, as scan() would add nothing for them.
+        """
+        boxes = self.detector.regions(frame)
+        if not boxes:
+            return []
+        with self.metrics.time("preprocess"):
+            batch = self.detector.crops(frame, boxes)
+        with self.metrics.time("predict"):
+            if self.lock is None:
+                predictions = self.inference.predict(batch)
+            else:
+                with self.lock:
+                    predictions = self.inference.predict(batch)
+        items = []
+        for box, prediction in zip(boxes, predictions):
+            product_class = int(np.argmax(prediction))
+            confidence = float(prediction[product_class])
+            if confidence >= self.confidence_threshold:
+                product = self.catalog.product_for_class(product_class)
+                if product is not None:
+                    items.append(Detection(product, box, confidence))
+            else:
+                x0, y0, x1, y1 = box
+                self._keep_if_unsure(frame[y0:y1, x0:x1], prediction)
+        return items
+
+    def recognize(self, frame):
+        """The catalog product recognized in `frame`, or None below the confidence threshold."""
+        prediction = self.recognizer(frame)
+        if self.voter is not None:
+            return self._vote(prediction)
+        product_class = int(np.argmax(prediction))
+        if prediction[product_class] < self.confidence_threshold:
+            return None
+        return self.catalog.product_for_class(product_class)
+
+    def _vote(self, prediction):
+        product_class = self.voter.update(prediction)
+        if product_class is None:
+            return None
+        product = self.catalog.product_for_class(product_class)
+        if product is not None and self.voter.just_confirmed:
+            seconds = self.voter.last_confirm_seconds
+            if seconds is not None:
+                self.metrics.observe("confirm", seconds)
+                print(f"Confirmed {product['name']} {seconds * 1e3:.0f} ms after it was presented")
+            if self.auto_scan:
+                self.auto_scans.put(product)
+        return product
+
+    def apply_auto_scans(self):
+        """Add the products confirmed since the last call to the cart; returns their lines."""
+        lines = []
+        while True:
+            try:
+                lines.append(self.cart.add(self.auto_scans.get_nowait()))
+            except queue.Empty:
+                return lines
+
+    def feed_frame(self, frame):
+        """Recognize `frame` and make its product the one scan() adds; returns the product or None.
+
+        In multi-item mode the detections are kept in `current_items` and the
+        first one's product is returned.
+        """
+        if not self.ready:
+            self.current_items = []
+            self.current_product = None
+        elif self.detector:
+            items = self.recognizer(frame)
+            # Set before current_items: annotate_items() reads both from another thread
+            self.items_frame_size = (frame.shape[1], frame.shape[0])
+            self.current_items = items
+            self.current_product = items[0].product if items else None
+        else:
+            self.current_product = self.recognize(frame)
+        return self.current_product
+
+    def scan(self):
+        """Add the product in view to the cart; returns its cart line, or None if nothing is recognized."""
+        product = self.current_product
+        if product is None:
+            return None
+        return self.cart.add(product)
+
+    def scan_all(self):
+        """Add every item in view to the cart (just the one product without a detector); returns their lines."""
+        if not self.detector:
+            line = self.scan()
+            return [] if line is None else [line]
+        return [self.cart.add(item.product) for item in self.current_items]
+
+    def undo(self):
+        return self.cart.undo()
+
+    def bill(self):
+        return Bill(self.cart.lines(), self.cart.item_count, self.cart.total_cents)
+
+    def pay(self, amount=None):
+        """Settle the cart with `amount` (number or entered text), or exactly the total when None.
+
+        Returns a Payment; `paid` is False if the amount is short. Raises
+        ValueError for amounts that cannot be read.
+        """
+        total = self.cart.total_cents
+        amount_cents = total if amount is None else to_cents(amount)
+        if amount_cents < total:
+            return Payment(False, amount_cents, total, 0)
+        self.last_payment = Payment(True, amount_cents, total, amount_cents - total)
+        return self.last_payment
+
+    def reset(self):
+        self.cart.clear()
+        self.current_product = None
+        self.current_items = []
+        self.last_payment = None
+        if self.voter is not None:
+            self.voter.reset()
+        while not self.auto_scans.empty():
+            self.auto_scans.get_nowait()
+
+    def stats(self):
+        return self.recognizer.stats()
+
+
+def create_lanes(count, inference, catalog, **kwargs):
+    """`count` lanes sharing one inference engine, with calls into it serialized."""
+    lock = threading.Lock()
+    return [CheckoutEngine(inference, catalog, lock=lock, **kwargs) for _ in range(count)]
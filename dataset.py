@@ -0,0 +1,73 @@
+import os
+from collections import deque
+
+import cv2
+import numpy as np
+
+IMAGE_SIZE = (150, 150)
+
+
+def list_samples(training_data):
+    """Paths of the .jpg images in each class folder and their class indices."""
+    paths = []
+    labels = []
+    for label, folder_path in enumerate(training_data):
+        for filename in sorted(os.listdir(folder_path)):
+            if filename.endswith('.jpg'):
+                paths.append(os.path.join(folder_path, filename))
+                labels.append(label)
+    return paths, np.array(labels)
+
+
+def load_batch(paths):
+    """Decode and resize a list of images; runs in a worker process.
+
+    Returns the uint8 images and the positions in `paths` that loaded.
+    """
+    images = np.empty((len(paths), IMAGE_SIZE[1], IMAGE_SIZE[0], 3), np.uint8)
+    loaded = []
+    for i, path in enumerate(paths):
+        img = cv2.imread(path)
+        if img is None:
+            print(f"Error loading image {path}")
+            continue
+        cv2.resize(img, IMAGE_SIZE, images[len(loaded)])
+        loaded.append(i)
+    return images[:len(loaded)], loaded
+
+
+def batch_generator(paths, labels, num_classes, batch_size=32, shuffle=True, seed=42, pool=None, prefetch=None):
+    """Yield (images, one-hot labels) batches forever, for model.fit(steps_per_epoch=...).
+
+    Batches are decoded in `pool` (a ProcessPoolExecutor, or in-process when
+    None) with up to `prefetch` batches in flight, and normalized to float32
+    as they are produced, so memory use depends on the batch size rather than
+    the dataset size. Raises ValueError when `paths` is empty, which would
+    otherwise never yield.
+    """
+    if not len(paths):
+        raise ValueError("No images to make batches from")
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+    one_hot = np.eye(num_classes, dtype=np.float32)
+    if prefetch is None:
+        prefetch = getattr(pool, "_max_workers", 1) + 1
+    while True:
+        order = rng.permutation(len(paths)) if shuffle else np.arange(len(paths))
+        batches = deque(order[i:i + batch_size] for i in range(0, len(order), batch_size))
+        pending = deque()
+        while batches or pending:
+            while batches and len(pending) < prefetch:
+                indices = batches.popleft()
+                batch_paths = [paths[i] for i in indices]
+                if pool is None:
+                    pending.append((indices, load_batch(batch_paths)))
+                else:
+                    pending.append((indices, pool.submit(load_batch, batch_paths)))
+            indices, result = pending.popleft()
+            images, loaded = result if pool is None else result.result()
+            if not loaded:
+                continue
+            x = images.astype(np.float32)
+            x *= 1 / 255.0
+            yield x, one_hot[labels[indices[loaded]]]
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from dataset import IMAGE_SIZE, list_samples, load_batch
+
+MANIFEST = "manifest.json"
+
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Preprocessed 150x150 uint8 images in memory-mapped .npy shards plus a manifest.
+
+    The manifest records each source image's mtime, size, SHA-1, label and
+    where its pixels live (shard file and row; None for images that failed
+    to decode). update() only decodes images that are new or whose contents
+    changed; everything else is read straight from the memory-mapped shards.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.entries = {}
+        self.shards = []
+        self._maps = {}
+        path = os.path.join(cache_dir, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest = json.load(f)
+            self.entries = manifest["entries"]
+            self.shards = manifest["shards"]
+
+    def __len__(self):
+        return sum(1 for entry in self.entries.values() if entry["shard"] is not None)
+
+    def update(self, training_data, pool=None, chunk_size=256):
+        """Sync the cache with the class folders; returns (images added, images removed)."""
+        paths, labels = list_samples(training_data)
+        todo = []
+        for path, label in zip(paths, labels):
+            label = int(label)
+            stat = os.stat(path)
+            entry = self.entries.get(path)
+            if entry and entry["label"] == label and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                continue
+            digest = file_hash(path)
+            if entry and entry["label"] == label and entry["sha1"] == digest:
+                # Touched but not changed
+                entry["mtime"] = stat.st_mtime
+                continue
+            todo.append((path, label, stat, digest))
+
+        current = set(paths)
+        removed = [path for path in self.entries if path not in current]
+        for path in removed:
+            del self.entries[path]
+        for path, _, _, _ in todo:
+            self.entries.pop(path, None)
+
+        if todo:
+            self._write_shard(todo, pool, chunk_size)
+        self._drop_unused_shards()
+        self._save_manifest()
+        return len(todo), len(removed)
+
+    def _write_shard(self, todo, pool, chunk_size):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Shards can be dropped from the middle, so number after the highest one left
+        number = max((int(name[6:11]) for name in self.shards), default=-1) + 1
+        name = f"shard-{number:05d}.npy"
+        width, height = IMAGE_SIZE
+        shard = np.lib.format.open_memmap(os.path.join(self.cache_dir, name), mode="w+", dtype=np.uint8,
+                                          shape=(len(todo), height, width, 3))
+        chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+        if pool is None:
+            results = (load_batch([item[0] for item in chunk]) for chunk in chunks)
+        else:
+            results = pool.map(load_batch, [[item[0] for item in chunk] for chunk in chunks])
+        row = 0
+        for chunk, (images, loaded) in zip(chunks, results):
+            shard[row:row + len(images)] = images
+            loaded = set(loaded)
+            for i, (path, label, stat, digest) in enumerate(chunk):
+                self.entries[path] = {
+                    "mtime": stat.st_mtime,
+                    "size": stat.st_size,
+                    "sha1": digest,
+                    "label": label,
+                    "shard": name if i in loaded else None,
+                    "row": row if i in loaded else None,
+                }
+                if i in loaded:
+                    row += 1
+        shard.flush()
+        del shard
+        self.shards.append(name)
+
+    def _drop_unused_shards(self):
+        used = {entry["shard"] for entry in self.entries.values()}
+        for name in [name for name in self.shards if name not in used]:
+            self._maps.pop(name, None)
+            os.remove(os.path.join(self.cache_dir, name))
+            self.shards.remove(name)
+
+    def _save_manifest(self):
+        path = os.path.join(self.cache_dir, MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump({"entries": self.entries, "shards": self.shards}, f)
+        os.replace(path + ".tmp", path)
+
+    def _shard(self, name):
+        if name not in self._maps:
+            self._maps[name] = np.load(os.path.join(self.cache_dir, name), mmap_mode="r")
+        return self._maps[name]
+
+    def split(self, test_fraction=0.2):
+        """Deterministic train/test split keyed on each image's content hash.
+
+        An image stays on the same side across runs and when new photos are
+        added. Returns (train, test), each a list of manifest entries.
+        """
+        train, test = [], []
+        for path in sorted(self.entries):
+            entry = self.entries[path]
+            if entry["shard"] is None:
+                continue
+            (test if int(entry["sha1"][:8], 16) / 0x100000000 < test_fraction else train).append(entry)
+        return train, test
+
+    def batches(self, entries, num_classes, batch_size=32, shuffle=True, seed=42):
+        """Yield normalized (images, one-hot labels) batches forever from the mapped shards.
+
+        Raises ValueError when `entries` is empty, which would otherwise never yield.
+        """
+        if not entries:
+            raise ValueError("No cached images to make batches from")
+        rng = np.random.default_rng(seed)
+        one_hot = np.eye(num_classes, dtype=np.float32)
+        labels = np.array([entry["label"] for entry in entries])
+        while True:
+            order = rng.permutation(len(entries)) if shuffle else np.arange(len(entries))
+            for start in range(0, len(order), batch_size):
+                indices = order[start:start + batch_size]
+                width, height = IMAGE_SIZE
+                x = np.empty((len(indices), height, width, 3), np.float32)
+                for i, index in enumerate(indices):
+                    entry = entries[index]
+                    x[i] = self._shard(entry["shard"])[entry["row"]]
+                x *= 1 / 255.0
+                yield x, one_hot[labels[indices]]
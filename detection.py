@@ -0,0 +1,75 @@
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+Detection = namedtuple("Detection", "product box confidence")
+
+
+def find_regions(frame, min_area=0.02, max_regions=8, work_width=320, pad=0.05):
+    """Bounding boxes (x0, y0, x1, y1) of likely items, largest first, from edges on a downscaled frame.
+
+    Edges are dilated so each item becomes one blob; blobs covering less than
+    `min_area` of the frame, or nearly all of it, are ignored.
+    """
+    height, width = frame.shape[:2]
+    scale = work_width / width
+    small = cv2.resize(frame, (work_width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+    gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+    edges = cv2.dilate(cv2.Canny(gray, 50, 150), np.ones((5, 5), np.uint8), iterations=2)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    frame_area = small.shape[0] * small.shape[1]
+    rects = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if min_area * frame_area <= w * h <= 0.9 * frame_area:
+            rects.append((x, y, w, h))
+    rects.sort(key=lambda r: r[2] * r[3], reverse=True)
+
+    boxes = []
+    for x, y, w, h in rects[:max_regions]:
+        px, py = int(w * pad), int(h * pad)
+        boxes.append((max(0, int((x - px) / scale)), max(0, int((y - py) / scale)),
+                      min(width, int((x + w + px) / scale)), min(height, int((y + h + py) / scale))))
+    return boxes
+
+
+def grid_regions(frame_shape, rows=2, cols=2):
+    """The frame split into a rows x cols grid of boxes."""
+    height, width = frame_shape[:2]
+    return [(c * width // cols, r * height // rows, (c + 1) * width // cols, (r + 1) * height // rows)
+            for r in range(rows) for c in range(cols)]
+
+
+class ItemDetector:
+    """Finds candidate item regions in a frame and packs their crops into one model batch.
+
+    `method` is "contours" (find_regions) or "grid" (grid_regions). crops()
+    fills a reusable float32 (max_items, H, W, 3) buffer and returns the
+    filled part, so all regions are classified in a single predict call.
+    """
+
+    def __init__(self, method="contours", size=(150, 150), max_items=8, min_area=0.02, grid=(2, 2)):
+        if method not in ("contours", "grid"):
+            raise ValueError(f"Unknown region method {method!r}, expected 'contours' or 'grid'")
+        width, height = size
+        self.method = method
+        self.size = size
+        self.max_items = max_items
+        self.min_area = min_area
+        self.grid = grid
+        self._resized = np.empty((height, width, 3), np.uint8)
+        self._scale = np.float32(1 / 255.0)
+        self.buffer = np.empty((max_items, height, width, 3), np.float32)
+
+    def regions(self, frame):
+        if self.method == "grid":
+            return grid_regions(frame.shape, *self.grid)[:self.max_items]
+        return find_regions(frame, self.min_area, self.max_items)
+
+    def crops(self, frame, boxes):
+        for i, (x0, y0, x1, y1) in enumerate(boxes):
+            cv2.resize(frame[y0:y1, x0:x1], self.size, self._resized)
+            np.multiply(self._resized, self._scale, out=self.buffer[i])
+        return self.buffer[:len(boxes)]
@@ -0,0 +1,69 @@
+import time
+
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+from metrics import NULL_METRICS
+
+
+class FrameDisplay:
+    """Shows camera frames in a Tk label through a single, reused PhotoImage.
+
+    Each frame is colour-converted once into a reused RGB buffer, copied into
+    a reused PIL image and pasted into the label's PhotoImage, so nothing is
+    allocated per frame. Frames offered faster than `max_fps` are dropped.
+
+    show() does everything; callers that need the RGB frame themselves (e.g.
+    for MediaPipe) can use convert(), draw on the result and then present().
+    Conversion and PhotoImage update times go to `metrics`.
+    """
+
+    def __init__(self, label, max_fps=30, metrics=None):
+        self.label = label
+        self.metrics = metrics or NULL_METRICS
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self._last_shown = 0.0
+        self._photo = None
+
+    def _allocate(self, width, height):
+        self._rgb = np.empty((height, width, 3), np.uint8)
+        self._image = Image.new("RGB", (width, height))
+        self._photo = ImageTk.PhotoImage("RGB", (width, height))
+        self.label.img_tk = self._photo
+        self.label.config(image=self._photo)
+
+    def due(self):
+        """True if a frame shown now would not exceed the frame-rate cap."""
+        return time.perf_counter() - self._last_shown >= self.min_interval
+
+    def convert(self, frame, rgb=False):
+        """Convert a BGR frame (or copy an RGB one) into the display buffer and return it (RGB)."""
+        height, width = frame.shape[:2]
+        if self._photo is None or self._rgb.shape[:2] != (height, width):
+            self._allocate(width, height)
+        with self.metrics.time("convert"):
+            if rgb:
+                np.copyto(self._rgb, frame)
+            else:
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, self._rgb)
+        return self._rgb
+
+    def present(self):
+        """Push the display buffer to the label."""
+        with self.metrics.time("display"):
+            self._image.frombytes(self._rgb)
+            self._photo.paste(self._image)
+        self._last_shown = time.perf_counter()
+        self.frames_shown += 1
+
+    def show(self, frame, rgb=False):
+        """Display a BGR (or RGB) frame; returns False if it was dropped by the frame-rate cap."""
+        if not self.due():
+            self.frames_dropped += 1
+            return False
+        self.convert(frame, rgb)
+        self.present()
+        return True
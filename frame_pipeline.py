@@ -0,0 +1,112 @@
+import threading
+import time
+
+import cv2
+
+from metrics import NULL_METRICS
+
+
+class LatestFrameQueue:
+    """Single-slot queue: put() replaces any item the consumer has not taken yet."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Wait for the newest item and take it, or return None on timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._item is not None, timeout):
+                return None
+            item, self._item = self._item, None
+            return item
+
+    def get_nowait(self):
+        with self._cond:
+            item, self._item = self._item, None
+            return item
+
+
+class FramePipeline:
+    """Camera capture and recognition on background threads.
+
+    The capture thread reads frames, hands the newest one to the inference
+    worker and publishes an annotated copy for display. The inference worker
+    only ever sees the most recent frame, so slow predictions drop stale
+    frames instead of queueing them. The Tk loop just polls latest_frame()
+    and result. Raw frames are also put into each LatestFrameQueue in
+    `subscribers`, for other consumers of the camera such as the gesture
+    keyboard. Capture and annotation times go to `metrics`.
+    """
+
+    def __init__(self, cap, recognize, annotate, frame_size=None, subscribers=None, metrics=None):
+        self.cap = cap
+        self.metrics = metrics or NULL_METRICS
+        self.subscribers = subscribers if subscribers is not None else []
+        self.frame_size = frame_size
+        self.recognize = recognize
+        self.annotate = annotate
+        self.frames = LatestFrameQueue()
+        self.display = LatestFrameQueue()
+        self.result = None
+        self.running = False
+        self._threads = []
+
+    def start(self):
+        self.running = True
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    def latest_frame(self):
+        return self.display.get_nowait()
+
+    def _capture_loop(self):
+        while self.running:
+            with self.metrics.time("capture"):
+                ret, frame = self.cap.read()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            # Inference gets the camera frame untouched and resizes it once itself
+            self.frames.put(frame)
+            for frames in list(self.subscribers):
+                frames.put(frame)
+            if self.frame_size is not None:
+                display = cv2.resize(frame, self.frame_size)
+            else:
+                # The inference worker reads `frame`, so annotate a copy
+                display = frame.copy()
+            try:
+                with self.metrics.time("annotate"):
+                    display = self.annotate(display, self.result)
+                self.display.put(display)
+            except Exception as e:
+                print(f"Error while annotating frame: {e}")
+
+    def _inference_loop(self):
+        while self.running:
+            frame = self.frames.get(timeout=0.1)
+            if frame is None:
+                continue
+            try:
+                self.result = self.recognize(frame)
+            except Exception as e:
+                print(f"Error during recognition: {e}")
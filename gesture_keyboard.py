@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from frame_pipeline import LatestFrameQueue
+from hand_tracking import FingertipTracker, PredictiveFingertipTracker
+from keypad import get_keypad
+from metrics import NULL_METRICS
+
+KEYBOARD_KEYS = [
+    ["1", "2", "3"],
+    ["4", "5", "6"],
+    ["7", "8", "9"],
+    ["0", "Delete", "Enter"]
+]
+
+
+class GestureKeyboard:
+    """Keypad drawn on camera frames and pressed with the index fingertip.
+
+    process() draws the keypad and the tracked hand on an RGB frame and
+    returns the label of the key pressed on that frame, if any. A key counts
+    as pressed when the fingertip is within `press_radius` pixels of its
+    centre, at most once every `debounce` seconds and not twice in a row.
+    Keypad drawing and hands.process() times go to `metrics`.
+    """
+
+    def __init__(self, hands, keys=KEYBOARD_KEYS, key_width=100, key_height=80, x_gap=30, y_gap=22, padding=15,
+                 tracking_scale=0.5, roi_margin=60, detection_interval=3, press_radius=50, debounce=0.2,
+                 metrics=None):
+        import mediapipe as mp
+        self.keys = keys
+        self.metrics = metrics or NULL_METRICS
+        self.layout = (key_width, key_height, x_gap, y_gap, padding)
+        self.press_radius = press_radius
+        self.debounce = debounce
+        self.tracker = PredictiveFingertipTracker(FingertipTracker(hands, tracking_scale, roi_margin, metrics),
+                                                  detection_interval)
+        self._drawing = mp.solutions.drawing_utils
+        self._connections = mp.solutions.hands.HAND_CONNECTIONS
+        # MediaPipe's default red landmarks, given in RGB because they are drawn on the RGB frame
+        self._landmark_style = self._drawing.DrawingSpec(color=(255, 0, 0))
+        self.last_key = None
+        self.last_press_time = time.time()
+
+    def reset(self):
+        self.last_key = None
+        self.last_press_time = time.time()
+        self.tracker.reset()
+
+    def process(self, frame_rgb):
+        """Draw the keypad and hand on `frame_rgb` in place; returns the pressed key's label or None."""
+        frame_height, frame_width = frame_rgb.shape[:2]
+        keypad = get_keypad(self.keys, (frame_width, frame_height), *self.layout)
+        with self.metrics.time("keypad"):
+            keypad.draw(frame_rgb)
+        fingertip, hand_landmarks, region = self.tracker.locate(frame_rgb, keypad.box)
+        if not fingertip:
+            return None
+        x, y = fingertip
+        if hand_landmarks is not None:
+            # Landmarks are relative to the tracked region; draw them on that view of the frame
+            x0, y0, x1, y1 = region
+            self._drawing.draw_landmarks(frame_rgb[y0:y1, x0:x1], hand_landmarks, self._connections,
+                                         landmark_drawing_spec=self._landmark_style)
+        else:
+            # Predicted between detections
+            cv2.circle(frame_rgb, fingertip, 8, (255, 0, 0), 2)
+        key = keypad.key_at(x, y)
+        if key is None:
+            return None
+        l = np.sqrt((x - key.cx) ** 2 + (y - key.cy) ** 2)
+        if l <= self.press_radius and (time.time() - self.last_press_time) > self.debounce and key.label != self.last_key:
+            self.last_key = key.label
+            self.last_press_time = time.time()
+            return key.label
+        return None
+
+
+class GestureKeyboardSession:
+    """Runs a GestureKeyboard on a background thread over frames from a LatestFrameQueue.
+
+    Camera frames (BGR) are taken from `frames`; annotated RGB frames are
+    published on `display` and pressed keys on the `keys` queue, both for the
+    Tk loop to poll.
+    """
+
+    def __init__(self, keyboard, frames):
+        self.keyboard = keyboard
+        self.frames = frames
+        self.display = LatestFrameQueue()
+        self.keys = queue.Queue()
+        self.running = True
+        self.keyboard.reset()
+        self._thread = threading.Thread(target=self._loop, name="gesture-keyboard", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        self._thread.join(timeout=1.0)
+
+    def _loop(self):
+        while self.running:
+            frame = self.frames.get(timeout=0.1)
+            if frame is None:
+                continue
+            try:
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                key = self.keyboard.process(frame_rgb)
+            except Exception as e:
+                print(f"Error in gesture keyboard: {e}")
+                continue
+            self.display.put(frame_rgb)
+            if key is not None:
+                self.keys.put(key)
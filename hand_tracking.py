@@ -0,0 +1,116 @@
+import cv2
+import numpy as np
+
+from metrics import NULL_METRICS
+
+
+class FingertipTracker:
+    """Locates the index fingertip with MediaPipe Hands on a reduced image.
+
+    With `roi_margin` set, landmark detection only sees a crop of the keypad
+    bounding box grown by that many pixels; with `scale` below 1 the image
+    (or crop) is downscaled first. Fingertip coordinates are always returned
+    in full-frame pixels. hands.process() times go to `metrics`.
+    """
+
+    def __init__(self, hands, scale=1.0, roi_margin=None, metrics=None):
+        import mediapipe as mp
+        self.hands = hands
+        self.metrics = metrics or NULL_METRICS
+        self.scale = scale
+        self.roi_margin = roi_margin
+        self._fingertip = mp.solutions.hands.HandLandmark.INDEX_FINGER_TIP
+
+    def region(self, frame_shape, keypad_box=None):
+        """(x0, y0, x1, y1) of the part of the frame that is run through MediaPipe."""
+        height, width = frame_shape[:2]
+        if self.roi_margin is None or keypad_box is None:
+            return 0, 0, width, height
+        x0, y0, x1, y1 = keypad_box
+        m = self.roi_margin
+        return max(0, x0 - m), max(0, y0 - m), min(width, x1 + m), min(height, y1 + m)
+
+    def locate(self, frame_rgb, keypad_box=None):
+        """Return ((x, y), hand_landmarks, region) for the first hand, or (None, None, region).
+
+        Landmarks are normalized to `region`, so draw them on
+        frame[y0:y1, x0:x1].
+        """
+        region = self.region(frame_rgb.shape, keypad_box)
+        x0, y0, x1, y1 = region
+        image = frame_rgb
+        if (x0, y0, x1, y1) != (0, 0, frame_rgb.shape[1], frame_rgb.shape[0]):
+            image = np.ascontiguousarray(frame_rgb[y0:y1, x0:x1])
+        if self.scale != 1.0:
+            image = cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        with self.metrics.time("hands"):
+            results = self.hands.process(image)
+        if not results.multi_hand_landmarks:
+            return None, None, region
+        hand_landmarks = results.multi_hand_landmarks[0]
+        tip = hand_landmarks.landmark[self._fingertip]
+        x = x0 + int(tip.x * (x1 - x0))
+        y = y0 + int(tip.y * (y1 - y0))
+        return (x, y), hand_landmarks, region
+
+
+class PredictiveFingertipTracker:
+    """Runs landmark detection only every `detect_every` frames and predicts the fingertip in between.
+
+    A constant-velocity Kalman filter on the fingertip is corrected with each
+    detection. Detection also runs early once the predicted position's
+    standard deviation exceeds `max_uncertainty` pixels, and whenever the
+    hand was lost.
+    """
+
+    def __init__(self, tracker, detect_every=3, max_uncertainty=25.0, process_noise=1.0, measurement_noise=2.0):
+        self.tracker = tracker
+        self.detect_every = detect_every
+        self.max_uncertainty = max_uncertainty
+        self.kalman = cv2.KalmanFilter(4, 2)
+        # State is (x, y, vx, vy), one frame per step
+        self.kalman.transitionMatrix = np.array([[1, 0, 1, 0],
+                                                 [0, 1, 0, 1],
+                                                 [0, 0, 1, 0],
+                                                 [0, 0, 0, 1]], np.float32)
+        self.kalman.measurementMatrix = np.eye(2, 4, dtype=np.float32)
+        self.kalman.processNoiseCov = np.diag([1, 1, 4, 4]).astype(np.float32) * process_noise
+        self.kalman.measurementNoiseCov = np.eye(2, dtype=np.float32) * measurement_noise ** 2
+        self.tracking = False
+        self.frames_since_detection = 0
+        self.detections = 0
+        self.predictions = 0
+
+    def reset(self):
+        """Forget the tracked fingertip, so the next locate() detects the hand afresh."""
+        self.tracking = False
+        self.frames_since_detection = 0
+        self.kalman.statePost = np.zeros((4, 1), np.float32)
+
+    def uncertainty(self):
+        covariance = self.kalman.errorCovPre
+        return float(np.sqrt(covariance[0, 0] + covariance[1, 1]))
+
+    def locate(self, frame_rgb, keypad_box=None):
+        """Same as FingertipTracker.locate; hand_landmarks is None for predicted positions."""
+        if self.tracking:
+            predicted = self.kalman.predict()
+            self.frames_since_detection += 1
+            if self.frames_since_detection < self.detect_every and self.uncertainty() <= self.max_uncertainty:
+                self.predictions += 1
+                return (int(predicted[0, 0]), int(predicted[1, 0])), None, None
+
+        fingertip, hand_landmarks, region = self.tracker.locate(frame_rgb, keypad_box)
+        self.detections += 1
+        self.frames_since_detection = 0
+        if fingertip is None:
+            self.tracking = False
+            return None, None, region
+        measurement = np.array([[fingertip[0]], [fingertip[1]]], np.float32)
+        if self.tracking:
+            self.kalman.correct(measurement)
+        else:
+            self.kalman.statePost = np.array([[fingertip[0]], [fingertip[1]], [0], [0]], np.float32)
+            self.kalman.errorCovPost = np.diag([4, 4, 100, 100]).astype(np.float32)
+            self.tracking = True
+        return fingertip, hand_landmarks, region
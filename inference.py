@@ -0,0 +1,170 @@
+import os
+
+import numpy as np
+
+BACKENDS = ("keras", "compiled", "tflite")
+
+
+class KerasEngine:
+    """Plain Keras `model.predict`, the original inference path."""
+
+    name = "keras"
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, batch):
+        return self.model.predict(batch)
+
+
+class CompiledEngine:
+    """Calls the model through a traced tf.function, skipping predict()'s per-call set-up."""
+
+    name = "compiled"
+
+    def __init__(self, model):
+        import tensorflow as tf
+        signature = [tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32)]
+        self._call = tf.function(lambda x: model(x, training=False), input_signature=signature)
+
+    def predict(self, batch):
+        # The traced signature is float32; this is a no-op for batches that already are
+        return self._call(np.asarray(batch, np.float32)).numpy()
+
+
+class TFLiteEngine:
+    """Runs a TFLite export of the model with the CPU interpreter.
+
+    Works with float exports and with int8-quantized ones, quantizing the
+    input and dequantizing the output as needed.
+    """
+
+    name = "tflite"
+
+    def __init__(self, model_path, num_threads=None):
+        if not model_path.endswith(".tflite"):
+            model_path = export_tflite(model_path)
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = self._input["shape"][0]
+
+    def predict(self, batch):
+        # set_tensor() rejects float64 input
+        batch = np.asarray(batch, np.float32)
+        if batch.shape[0] != self._batch_size:
+            self.interpreter.resize_tensor_input(self._input["index"], batch.shape)
+            self.interpreter.allocate_tensors()
+            self._batch_size = batch.shape[0]
+        if self._input["dtype"] != np.float32:
+            scale, zero_point = self._input["quantization"]
+            limits = np.iinfo(self._input["dtype"])
+            batch = np.clip(np.round(batch / scale + zero_point), limits.min, limits.max).astype(self._input["dtype"])
+        self.interpreter.set_tensor(self._input["index"], batch)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self._output["index"])
+        if self._output["dtype"] != np.float32:
+            scale, zero_point = self._output["quantization"]
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+def export_tflite(model_path, tflite_path=None):
+    """Convert a Keras .h5 model to .tflite, reusing an export that is newer than the model."""
+    if tflite_path is None:
+        tflite_path = os.path.splitext(model_path)[0] + ".tflite"
+    if os.path.exists(tflite_path) and os.path.getmtime(tflite_path) >= os.path.getmtime(model_path):
+        return tflite_path
+    import tensorflow as tf
+    from keras.models import load_model
+    converter = tf.lite.TFLiteConverter.from_keras_model(load_model(model_path))
+    with open(tflite_path, "wb") as f:
+        f.write(converter.convert())
+    print(f"Exported {model_path} to {tflite_path}")
+    return tflite_path
+
+
+def export_int8_tflite(model_path, representative_inputs, tflite_path=None):
+    """Post-training int8 quantization of a Keras model.
+
+    `representative_inputs` yields preprocessed (1, 150, 150, 3) float32
+    batches used to calibrate the activation ranges; a few hundred training
+    images are enough.
+    """
+    if tflite_path is None:
+        tflite_path = os.path.splitext(model_path)[0] + ".int8.tflite"
+    import tensorflow as tf
+    from keras.models import load_model
+    converter = tf.lite.TFLiteConverter.from_keras_model(load_model(model_path))
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    representative_inputs = list(representative_inputs)
+    converter.representative_dataset = lambda: ([batch] for batch in representative_inputs)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    with open(tflite_path, "wb") as f:
+        f.write(converter.convert())
+    print(f"Exported int8 model {tflite_path}")
+    return tflite_path
+
+
+def create_engine(backend, model_path, num_threads=None, model=None):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend!r}, expected one of {BACKENDS}")
+    if model_path.endswith(".tflite") and backend != "tflite":
+        raise ValueError(f"{model_path} can only be run with the tflite backend")
+    if backend == "tflite":
+        return TFLiteEngine(model_path, num_threads)
+    if model is None:
+        from keras.models import load_model
+        model = load_model(model_path)
+    if backend == "compiled":
+        return CompiledEngine(model)
+    return KerasEngine(model)
+
+
+def sample_inputs(count=8, input_shape=(150, 150, 3), seed=0):
+    """Deterministic preprocessed frames for the start-up self-check."""
+    rng = np.random.default_rng(seed)
+    return [rng.random((1,) + input_shape, dtype=np.float32) for _ in range(count)]
+
+
+def self_check(reference, engine, inputs=None):
+    """Return True if `engine` gives the same top-1 class as `reference` on every sample."""
+    if inputs is None:
+        inputs = sample_inputs()
+    mismatches = 0
+    for batch in inputs:
+        expected = int(np.argmax(reference.predict(batch)[0]))
+        actual = int(np.argmax(engine.predict(batch)[0]))
+        if expected != actual:
+            mismatches += 1
+    if mismatches:
+        print(f"Self-check: {engine.name} disagrees with {reference.name} on {mismatches}/{len(inputs)} samples")
+    return mismatches == 0
+
+
+def load_engine(backend, model_path, num_threads=None, model=None, check=True):
+    """Create the configured engine, falling back to Keras if it fails the self-check.
+
+    A .tflite `model_path` (e.g. an int8 export) always uses the tflite
+    backend and has no Keras model to check against.
+    """
+    if model_path.endswith(".tflite"):
+        return create_engine("tflite", model_path, num_threads)
+    if model is None and (backend != "tflite" or check):
+        from keras.models import load_model
+        model = load_model(model_path)
+    engine = create_engine(backend, model_path, num_threads, model)
+    if backend == "keras" or not check:
+        return engine
+    reference = create_engine("keras", model_path, model=model)
+    if not self_check(reference, engine):
+        print("Falling back to the keras backend")
+        return reference
+    return engine
@@ -0,0 +1,338 @@
+"""Shared inference server: one model for many checkout lanes, with dynamic micro-batching.
+
+    python inference_server.py serve --model self_checkout_model.h5 --max-batch 8 --max-wait-ms 5
+    python inference_server.py loadtest --lanes 8 --fps 15 --seconds 20
+
+Lanes connect with RemoteEngine, which has the same predict(batch) interface
+as the engines in inference.py and falls back to a local engine while the
+server cannot be reached.
+
+Connections are authenticated with the key in $INFERENCE_AUTHKEY (or
+--authkey). A built-in development key is only used when the server is bound
+to the loopback interface or a local socket.
+"""
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+ADDRESS = ("127.0.0.1", 6010)
+AUTHKEY_ENV = "INFERENCE_AUTHKEY"
+# Only for servers reachable from this machine alone
+LOOPBACK_AUTHKEY = b"self-checkout"
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+# Longest lane name accepted in a connection's first message
+MAX_LANE_NAME = 256
+INPUT_SHAPE = (150, 150, 3)
+
+
+def parse_address(text):
+    """'host:port' for TCP, anything else is a Unix socket / Windows pipe path."""
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit():
+        return host or "127.0.0.1", int(port)
+    return text
+
+
+def resolve_authkey(address, authkey=None):
+    """`authkey`, else $INFERENCE_AUTHKEY, else the development key for loopback addresses.
+
+    Raises ValueError for a TCP address on another interface with no key set.
+    """
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_ENV)
+    if authkey:
+        return authkey.encode() if isinstance(authkey, str) else authkey
+    if isinstance(address, tuple) and address[0] not in LOOPBACK_HOSTS:
+        raise ValueError(f"No authkey for {address[0]}:{address[1]}; set ${AUTHKEY_ENV} or pass --authkey")
+    return LOOPBACK_AUTHKEY
+
+
+class InferenceServer:
+    """Gathers frame requests from all connected lanes into batches for one engine.
+
+    A request holds one or more frames (several item crops in multi-item
+    mode). A batch is run as soon as `max_batch` requests are waiting or
+    `max_wait` seconds after the first arrived, whichever comes first, and
+    is split so it never holds more than `max_batch` frames. Each lane's
+    rows are sent back on its own connection.
+    """
+
+    def __init__(self, engine, address=ADDRESS, max_batch=8, max_wait=0.005, authkey=None):
+        self.engine = engine
+        self.address = address
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.authkey = resolve_authkey(address, authkey)
+        self.requests = queue.Queue()
+        self.batch = np.empty((max_batch,) + INPUT_SHAPE, np.float32)
+        self.batch_sizes = Counter()
+        self.lane_frames = Counter()
+        self.running = False
+
+    def serve_forever(self):
+        self.running = True
+        listener = Listener(self.address, backlog=64, authkey=self.authkey)
+        print(f"Inference server listening on {listener.address}")
+        threading.Thread(target=self._accept_loop, args=(listener,), name="accept", daemon=True).start()
+        try:
+            while self.running:
+                self._run_batch()
+        finally:
+            self.running = False
+            listener.close()
+
+    def _accept_loop(self, listener):
+        while self.running:
+            try:
+                conn = listener.accept()
+            except OSError:
+                continue
+            threading.Thread(target=self._read_loop, args=(conn,), name="lane", daemon=True).start()
+
+    def _read_loop(self, conn):
+        lane = None
+        try:
+            # Raw bytes only: recv() would unpickle whatever the client sends
+            lane = conn.recv_bytes(MAX_LANE_NAME).decode("utf-8", "replace")
+            print(f"Lane {lane} connected")
+            while self.running:
+                data = conn.recv_bytes()
+                self.requests.put((conn, lane, data))
+        except (EOFError, OSError):
+            pass
+        conn.close()
+        print(f"Lane {lane} disconnected")
+
+    def _collect(self):
+        try:
+            pending = [self.requests.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.max_wait
+        while len(pending) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return pending
+
+    def _run_batch(self):
+        frame_bytes = self.batch[0].nbytes
+        accepted = []
+        rows = 0
+        for conn, lane, data in self._collect():
+            frames = len(data) // frame_bytes
+            if not frames or len(data) % frame_bytes:
+                # Not preprocessed frames of the expected size
+                self._reply(conn, b"")
+                continue
+            images = np.frombuffer(data, np.float32).reshape((frames,) + INPUT_SHAPE)
+            if frames > self.max_batch:
+                # Too many crops to share a batch; run them on their own
+                self._predict(images, [(conn, lane, frames)])
+                continue
+            if rows + frames > self.max_batch:
+                self._predict(self.batch[:rows], accepted)
+                accepted, rows = [], 0
+            self.batch[rows:rows + frames] = images
+            accepted.append((conn, lane, frames))
+            rows += frames
+        if accepted:
+            self._predict(self.batch[:rows], accepted)
+
+    def _predict(self, batch, requests):
+        try:
+            outputs = np.asarray(self.engine.predict(batch), np.float32)
+        except Exception as e:
+            print(f"Error during batched prediction: {e}")
+            outputs = None
+        start = 0
+        for conn, lane, frames in requests:
+            self._reply(conn, b"" if outputs is None else outputs[start:start + frames].tobytes())
+            start += frames
+            self.lane_frames[lane] += frames
+        self.batch_sizes[len(batch)] += 1
+
+    def _reply(self, conn, data):
+        try:
+            conn.send_bytes(data)
+        except OSError:
+            pass
+
+    def stats(self):
+        batches = sum(self.batch_sizes.values())
+        frames = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "batches": batches,
+            "frames": frames,
+            "mean_batch_size": frames / batches if batches else 0.0,
+            "lanes": dict(self.lane_frames),
+        }
+
+
+class RemoteEngine:
+    """predict(batch) through an InferenceServer, with a local engine while the server is unreachable.
+
+    `fallback` is a callable that creates the local engine; it is only
+    called the first time the server cannot be reached, so lanes using the
+    server never load the model themselves. A server that does not answer
+    within `timeout` seconds is treated as lost. Reconnecting is retried
+    every `retry_interval` seconds.
+    """
+
+    name = "remote"
+
+    def __init__(self, address=ADDRESS, fallback=None, lane=None, authkey=None, retry_interval=5.0, timeout=1.0):
+        self.address = address
+        self.fallback = fallback
+        self.lane = lane if lane is not None else f"{id(self):x}"
+        self.authkey = resolve_authkey(address, authkey)
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.local = None
+        self._conn = None
+        self._next_attempt = 0.0
+        self.remote_predictions = 0
+        self.local_predictions = 0
+
+    def _connect(self):
+        if self._conn is None and time.monotonic() >= self._next_attempt:
+            try:
+                self._conn = Client(self.address, authkey=self.authkey)
+                self._conn.send_bytes(str(self.lane).encode()[:MAX_LANE_NAME])
+                print(f"Lane {self.lane}: using inference server at {self.address}")
+            except OSError as e:
+                self._conn = None
+                self._next_attempt = time.monotonic() + self.retry_interval
+                print(f"Lane {self.lane}: inference server unavailable ({e}), predicting locally")
+        return self._conn
+
+    def _disconnect(self):
+        try:
+            self._conn.close()
+        except OSError:
+            pass
+        self._conn = None
+        self._next_attempt = time.monotonic() + self.retry_interval
+
+    def predict(self, batch):
+        conn = self._connect()
+        if conn is not None:
+            try:
+                conn.send_bytes(np.ascontiguousarray(batch, np.float32))
+                if not conn.poll(self.timeout):
+                    raise TimeoutError(f"no reply within {self.timeout} s")
+                data = conn.recv_bytes()
+                if data:
+                    self.remote_predictions += 1
+                    return np.frombuffer(data, np.float32).reshape(batch.shape[0], -1)
+            except (EOFError, OSError) as e:
+                # TimeoutError is an OSError; the late reply would be out of step, so reconnect
+                print(f"Lane {self.lane}: lost the inference server ({e}), predicting locally")
+                self._disconnect()
+        if self.fallback is None:
+            raise RuntimeError("Inference server unavailable and no local fallback configured")
+        if self.local is None:
+            self.local = self.fallback()
+        self.local_predictions += 1
+        return self.local.predict(batch)
+
+    def close(self):
+        if self._conn is not None:
+            self._disconnect()
+
+
+def load_test(address, lanes, fps, seconds, authkey=None):
+    """Simulate `lanes` checkout lanes, each sending `fps` frames a second, and report latency."""
+    rng = np.random.default_rng(0)
+    frames = [rng.random((1,) + INPUT_SHAPE, dtype=np.float32) for _ in range(8)]
+    latencies = [[] for _ in range(lanes)]
+    failures = Counter()
+
+    def lane_loop(index):
+        engine = RemoteEngine(address, lane=f"load-{index}", authkey=authkey)
+        interval = 1.0 / fps if fps else 0.0
+        end = time.perf_counter() + seconds
+        next_frame = time.perf_counter()
+        i = 0
+        while time.perf_counter() < end:
+            start = time.perf_counter()
+            try:
+                engine.predict(frames[i % len(frames)])
+                latencies[index].append(time.perf_counter() - start)
+            except RuntimeError:
+                failures[index] += 1
+                time.sleep(engine.retry_interval)
+            i += 1
+            next_frame += interval
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+        engine.close()
+
+    threads = [threading.Thread(target=lane_loop, args=(i,)) for i in range(lanes)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    all_ms = np.array([t for lane in latencies for t in lane]) * 1e3
+    if not len(all_ms):
+        print("No predictions completed; is the server running?")
+        return
+    print(f"{lanes} lanes, {len(all_ms)} predictions in {elapsed:.1f} s: {len(all_ms) / elapsed:.1f} frames/s")
+    print(f"latency p50 {np.percentile(all_ms, 50):.1f} ms  p95 {np.percentile(all_ms, 95):.1f} ms  "
+          f"p99 {np.percentile(all_ms, 99):.1f} ms")
+    for index, lane in enumerate(latencies):
+        if lane:
+            print(f"  lane {index}: {len(lane)} frames, p50 {np.median(lane) * 1e3:.1f} ms"
+                  + (f", {failures[index]} failures" if failures[index] else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--address", default=f"{ADDRESS[0]}:{ADDRESS[1]}", help="host:port or socket path")
+    parser.add_argument("--authkey", help=f"shared connection key (default: ${AUTHKEY_ENV}); "
+                                          "required unless the address is on the loopback interface")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the inference server")
+    serve.add_argument("--model", default="self_checkout_model.h5")
+    serve.add_argument("--backend", default="compiled")
+    serve.add_argument("--threads", type=int, default=2, help="TFLite interpreter threads")
+    serve.add_argument("--max-batch", type=int, default=8)
+    serve.add_argument("--max-wait-ms", type=float, default=5.0)
+    test = commands.add_parser("loadtest", help="simulate lanes against a running server")
+    test.add_argument("--lanes", type=int, default=8)
+    test.add_argument("--fps", type=float, default=15.0, help="frames per second per lane (0 = as fast as possible)")
+    test.add_argument("--seconds", type=float, default=20.0)
+    args = parser.parse_args()
+    address = parse_address(args.address)
+    try:
+        authkey = resolve_authkey(address, args.authkey)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.command == "serve":
+        from inference import load_engine
+        engine = load_engine(args.backend, args.model, args.threads)
+        server = InferenceServer(engine, address, args.max_batch, args.max_wait_ms / 1000, authkey)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        print(f"Inference server: {server.stats()}")
+    else:
+        load_test(address, args.lanes, args.fps, args.seconds, authkey)
+
+
+if __name__ == "__main__":
+    main()
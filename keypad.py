@@ -0,0 +1,89 @@
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+Key = namedtuple("Key", "index row col label x0 y0 x1 y1 cx cy")
+
+
+class Keypad:
+    """Keypad layout for one frame size, built once and reused every frame.
+
+    Holds the key rectangles and centres, a per-pixel lookup table of key
+    indices for hit testing, and (rendered on first draw) an overlay and
+    alpha mask covering only the keypad region. With `origin` None the keypad
+    is centred in the frame, otherwise its top-left corner is at `origin`.
+    """
+
+    def __init__(self, keys, frame_size, key_width, key_height, x_gap, y_gap, padding, origin=None, alpha=0.5):
+        frame_width, frame_height = frame_size
+        rows = len(keys)
+        cols = max(len(row) for row in keys)
+        self.frame_size = frame_size
+        self.alpha = alpha
+        self.width = cols * key_width + (cols - 1) * x_gap + 2 * padding
+        self.height = rows * key_height + (rows - 1) * y_gap + 2 * padding
+        if origin is None:
+            origin = ((frame_width - self.width) // 2, (frame_height - self.height) // 2)
+        self.x_start, self.y_start = origin
+        self.box = (self.x_start, self.y_start, self.x_start + self.width, self.y_start + self.height)
+
+        self.keys = []
+        self.lut = np.full((frame_height, frame_width), -1, np.int16)
+        for r, row in enumerate(keys):
+            for c, label in enumerate(row):
+                x0 = self.x_start + padding + c * (key_width + x_gap)
+                y0 = self.y_start + padding + r * (key_height + y_gap)
+                key = Key(len(self.keys), r, c, label, x0, y0, x0 + key_width, y0 + key_height,
+                          x0 + key_width // 2, y0 + key_height // 2)
+                self.keys.append(key)
+                # A key's hit area includes the gap after it, as the row/column division always did
+                self.lut[max(0, y0):max(0, y0 + key_height + y_gap), max(0, x0):max(0, x0 + key_width + x_gap)] = key.index
+        self.overlay = None
+
+    def key_at(self, x, y):
+        """The key under frame pixel (x, y), or None."""
+        if 0 <= x < self.frame_size[0] and 0 <= y < self.frame_size[1]:
+            index = self.lut[y, x]
+            if index >= 0:
+                return self.keys[index]
+        return None
+
+    def _region(self):
+        x0, y0, x1, y1 = self.box
+        return max(0, x0), max(0, y0), min(self.frame_size[0], x1), min(self.frame_size[1], y1)
+
+    def _render(self):
+        x0, y0, x1, y1 = self._region()
+        self.overlay = np.zeros((y1 - y0, x1 - x0, 3), np.uint8)
+        mask = np.zeros((y1 - y0, x1 - x0), np.uint8)
+        for key in self.keys:
+            color = (200, 200, 200) if key.label not in ["Delete", "Enter"] else (150, 150, 150)
+            top_left = (key.x0 - x0, key.y0 - y0)
+            bottom_right = (key.x1 - x0, key.y1 - y0)
+            text_origin = (key.x0 - x0 + (key.x1 - key.x0) // 4, key.cy - y0)
+            for image, rect_color, text_color in ((self.overlay, color, (0, 0, 0)), (mask, 255, 255)):
+                cv2.rectangle(image, top_left, bottom_right, rect_color, -1)
+                cv2.putText(image, key.label, text_origin, cv2.FONT_HERSHEY_SIMPLEX, 0.8, text_color, 2)
+        self.mask = (mask > 0)[:, :, np.newaxis]
+        self._blended = np.empty_like(self.overlay)
+
+    def draw(self, frame):
+        """Alpha-blend the keys onto `frame` in place, touching only the keypad region."""
+        if self.overlay is None:
+            self._render()
+        x0, y0, x1, y1 = self._region()
+        region = frame[y0:y1, x0:x1]
+        cv2.addWeighted(self.overlay, self.alpha, region, 1 - self.alpha, 0, self._blended)
+        np.copyto(region, self._blended, where=self.mask)
+
+
+_keypads = {}
+
+
+def get_keypad(keys, frame_size, key_width, key_height, x_gap, y_gap, padding, origin=None):
+    """Cached Keypad for this layout and frame size."""
+    cache_key = (tuple(map(tuple, keys)), frame_size, key_width, key_height, x_gap, y_gap, padding, origin)
+    if cache_key not in _keypads:
+        _keypads[cache_key] = Keypad(keys, frame_size, key_width, key_height, x_gap, y_gap, padding, origin)
+    return _keypads[cache_key]
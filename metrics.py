@@ -0,0 +1,203 @@
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+# Histogram bucket upper bounds in seconds, for the Prometheus export
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class StageHistogram:
+    """Durations of one stage: the last `window` samples for percentiles, plus cumulative buckets."""
+
+    def __init__(self, window=512, buckets=BUCKETS):
+        self.samples = [0.0] * window
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.samples[self.count % len(self.samples)] = seconds
+            self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def recent(self):
+        with self._lock:
+            return np.array(self.samples[:min(self.count, len(self.samples))])
+
+    def percentiles(self, q=(50, 95, 99)):
+        recent = self.recent()
+        if not len(recent):
+            return [0.0] * len(q)
+        return [float(p) for p in np.percentile(recent, q)]
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class Metrics:
+    """Rolling per-stage latency histograms.
+
+        with metrics.time("predict"):
+            ...
+
+    Every stage keeps its last `window` durations (for p50/p95/p99 in the
+    on-screen overlay) and cumulative Prometheus buckets. `labels` are added
+    to every exported series, e.g. {"lane": "1"}.
+    """
+
+    def __init__(self, labels=None, window=512):
+        self.labels = labels or {}
+        self.window = window
+        self.stages = {}
+        self._lock = threading.Lock()
+        self._overlay = []
+        self._overlay_time = 0.0
+
+    def histogram(self, stage):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, StageHistogram(self.window))
+        return histogram
+
+    def time(self, stage):
+        return _Timer(self.histogram(stage))
+
+    def observe(self, stage, seconds):
+        self.histogram(stage).observe(seconds)
+
+    def summary(self):
+        """{stage: (p50, p95, p99) in milliseconds} over the recent window."""
+        return {stage: tuple(p * 1e3 for p in histogram.percentiles())
+                for stage, histogram in sorted(self.stages.items())}
+
+    def draw_overlay(self, frame, refresh=0.5):
+        """Write recent stage percentiles in the top-right corner of `frame` (refreshed every `refresh` s)."""
+        now = time.perf_counter()
+        if now - self._overlay_time >= refresh:
+            self._overlay = [f"{stage:9s} {p50:5.1f} {p95:5.1f} {p99:5.1f}"
+                             for stage, (p50, p95, p99) in self.summary().items()]
+            self._overlay.insert(0, "stage ms   p50   p95   p99")
+            self._overlay_time = now
+        x = frame.shape[1] - 270
+        for i, line in enumerate(self._overlay):
+            cv2.putText(frame, line, (x, 20 + 16 * i), cv2.FONT_HERSHEY_PLAIN, 1.0, (0, 255, 255), 1, cv2.LINE_AA)
+        return frame
+
+    def prometheus_text(self, prefix="selfcheckout"):
+        """All stages in the Prometheus text exposition format."""
+        name = f"{prefix}_stage_duration_seconds"
+        base = "".join(f'{key}="{value}",' for key, value in sorted(self.labels.items()))
+        lines = [f"# HELP {name} Duration of each processing stage.", f"# TYPE {name} histogram"]
+        recent = []
+        for stage, histogram in sorted(self.stages.items()):
+            labels = f'{base}stage="{stage}"'
+            with histogram._lock:
+                counts = list(histogram.bucket_counts)
+                count, total = histogram.count, histogram.sum
+            cumulative = 0
+            for bound, bucket in zip(histogram.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {total}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+            for q, value in zip((0.5, 0.95, 0.99), histogram.percentiles()):
+                recent.append(f'{name}_recent{{{labels},quantile="{q}"}} {value}')
+        if recent:
+            lines += [f"# HELP {name}_recent Percentiles over the last {self.window} samples.",
+                      f"# TYPE {name}_recent gauge"] + recent
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Write prometheus_text() atomically, for node_exporter's textfile collector."""
+        with open(path + ".tmp", "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(path + ".tmp", path)
+
+    def serve_http(self, port, host="127.0.0.1"):
+        """Serve prometheus_text() at http://host:port/metrics from a background thread."""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+    def start_export(self, textfile=None, port=None, interval=10.0):
+        """Start the configured exports: an HTTP endpoint and/or a textfile rewritten every `interval` s."""
+        if port:
+            self.serve_http(port)
+            print(f"Metrics at http://127.0.0.1:{port}/metrics")
+        if textfile:
+            def write_loop():
+                while True:
+                    try:
+                        self.write_textfile(textfile)
+                    except OSError as e:
+                        print(f"Error writing metrics to {textfile}: {e}")
+                    time.sleep(interval)
+            threading.Thread(target=write_loop, name="metrics-textfile", daemon=True).start()
+
+
+class NullMetrics:
+    """Stand-in for Metrics when instrumentation is off."""
+
+    _timer = _NullTimer()
+
+    def time(self, stage):
+        return self._timer
+
+    def observe(self, stage, seconds):
+        pass
+
+    def draw_overlay(self, frame, refresh=0.5):
+        return frame
+
+
+NULL_METRICS = NullMetrics()
@@ -2,27 +2,75 @@ import qrcode
 import random
 import string
 import os
+import argparse
+import csv
+import hashlib
+import io
+import tarfile
+import threading
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# Payment payloads are at most this long ("amount:" holds up to 9999999.99), so one
+# QR version fits them all and the version search can be skipped
+MAX_PAYLOAD = "payment_id:XXXXXXXXXXXX;amount:9999999.99"
+# Fixed mask pattern: skips evaluating all eight masks per code, which is most of the encoding time
+MASK_PATTERN = 0
+
+PaymentCode = namedtuple("PaymentCode", "payment_id amount_cents data image")
 
 def generate_random_string(length=10):
     """Generate a random string of letters and digits."""
     return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
 
-def generate_qr_code(data, file_name="payment_qr.png"):
-    """Generate a QR code from the provided data."""
+def payment_data(payment_id, amount_cents):
+    return f"payment_id:{payment_id};amount:{amount_cents // 100}.{amount_cents % 100:02d}"
+
+def payment_version():
+    """Smallest QR version that holds any payment payload."""
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L)
+    qr.add_data(MAX_PAYLOAD)
+    return qr.best_fit()
+
+def make_qr_image(data, size=None, version=None, mask_pattern=None, border=4):
+    """Encode `data` and render it in memory as a black-on-white PIL image.
+
+    With `size` (width, height) the modules are scaled by a whole number of
+    pixels to fit and the code is centred on a white image of exactly that
+    size; otherwise each module is 10 pixels. Passing `version` and
+    `mask_pattern` skips qrcode's searches for them.
+    """
     qr = qrcode.QRCode(
-        version=1,
+        version=version,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
+        border=border,
+        mask_pattern=mask_pattern,
     )
     qr.add_data(data)
-    qr.make(fit=True)
+    qr.make(fit=version is None)
 
-    img = qr.make_image(fill_color="black", back_color="white")
+    modules = np.array(qr.get_matrix(), bool)
+    scale = 10 if size is None else max(1, min(size) // len(modules))
+    pixels = np.where(modules, 0, 255).astype(np.uint8).repeat(scale, axis=0).repeat(scale, axis=1)
+    img = Image.fromarray(pixels, "L")
+    if size is not None and img.size != tuple(size):
+        canvas = Image.new("L", tuple(size), 255)
+        canvas.paste(img, ((size[0] - img.width) // 2, (size[1] - img.height) // 2))
+        img = canvas
+    return img
+
+def generate_qr_code(data, file_name="payment_qr.png"):
+    """Generate a QR code from the provided data."""
+    img = make_qr_image(data)
     img.save(file_name)
     print(f"QR code saved as {file_name}")
 
-def generate_random_payment_qr_code(directory="qr_codes"):
+def generate_random_payment_qr_code(directory="qr_codes", amount_cents=10000):
     """Generate a random QR code for payment and save it to a file."""
     # Ensure the directory exists
     if not os.path.exists(directory):
@@ -30,16 +78,197 @@ def generate_random_payment_qr_code(directory="qr_codes"):
 
     # Generate random payment data
     random_payment_id = generate_random_string(12)  # e.g., a random transaction ID
-    payment_data = f"payment_id:{random_payment_id};amount:100.00"  # Example payment info
+    data = payment_data(random_payment_id, amount_cents)
 
     # Create file name based on the payment ID
     file_name = os.path.join(directory, f"{random_payment_id}.png")
 
     # Generate and save the QR code
-    generate_qr_code(payment_data, file_name)
+    generate_qr_code(data, file_name)
     return file_name
 
+
+class PaymentQRPool:
+    """Payment QR codes rendered in memory at display size, prepared in the background.
+
+    prepare(amount) builds a code for that amount with a fresh payment id on
+    a worker thread, keeping up to `pool_size` of them; take(amount) hands
+    out a prepared one (each only once, so ids are never reused) or builds it
+    on the spot. All codes share one QR version and mask pattern, so no code
+    pays for qrcode's version and mask searches. PNGs are written to
+    `archive_dir` only when it is set.
+    """
+
+    def __init__(self, size=(200, 200), pool_size=2, archive_dir=None, id_length=12):
+        self.size = size
+        self.pool_size = pool_size
+        self.archive_dir = archive_dir
+        self.id_length = id_length
+        self.version = payment_version()
+        self.issued = set()
+        self._ready = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="payment-qr")
+
+    def _new_id(self):
+        with self._lock:
+            while True:
+                payment_id = generate_random_string(self.id_length)
+                if payment_id not in self.issued:
+                    self.issued.add(payment_id)
+                    return payment_id
+
+    def build(self, amount_cents):
+        payment_id = self._new_id()
+        data = payment_data(payment_id, amount_cents)
+        image = make_qr_image(data, self.size, self.version, MASK_PATTERN)
+        return PaymentCode(payment_id, amount_cents, data, image)
+
+    def prepare(self, amount_cents):
+        """Start building codes for `amount_cents` in the background, replacing ones for other amounts."""
+        with self._lock:
+            self._ready = [future for future in self._ready if future.amount_cents == amount_cents]
+            missing = self.pool_size - len(self._ready)
+            for _ in range(missing):
+                future = self._executor.submit(self.build, amount_cents)
+                future.amount_cents = amount_cents
+                self._ready.append(future)
+
+    def take(self, amount_cents):
+        """A PaymentCode for `amount_cents` with an id that has not been handed out before."""
+        future = None
+        with self._lock:
+            for i, candidate in enumerate(self._ready):
+                if candidate.amount_cents == amount_cents:
+                    future = self._ready.pop(i)
+                    break
+        code = future.result() if future is not None else self.build(amount_cents)
+        if self.archive_dir:
+            self._executor.submit(self._archive, code)
+        return code
+
+    def _archive(self, code):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        code.image.save(os.path.join(self.archive_dir, f"{code.payment_id}.png"))
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def content_hash(data):
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:16]
+
+def render_png(data, size=None, mask_pattern=MASK_PATTERN):
+    """PNG bytes of the QR code for `data`; runs in a worker process."""
+    buffer = io.BytesIO()
+    make_qr_image(data, size, mask_pattern=mask_pattern).save(buffer, "PNG")
+    return buffer.getvalue()
+
+def read_rows(csv_path, template=None, name_field=None):
+    """(name, data) for each CSV row; data is `template` filled from the row, or all fields as key:value pairs."""
+    with open(csv_path, newline="") as f:
+        for row in csv.DictReader(f):
+            data = template.format_map(row) if template else ";".join(f"{k}:{v}" for k, v in row.items())
+            yield (row[name_field] if name_field else None), data
+
+
+class BatchOutput:
+    """Destination for batch-generated PNGs: a directory, or a .zip / .tar archive.
+
+    Archives that already exist are appended to. names() lists the PNGs
+    already present so the caller can skip them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.archive = None
+        if path.endswith(".zip"):
+            self.archive = zipfile.ZipFile(path, "a")
+            self._names = set(self.archive.namelist())
+        elif path.endswith(".tar"):
+            self.archive = tarfile.open(path, "a")
+            self._names = set(self.archive.getnames())
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._names = set(os.listdir(path))
+
+    def names(self):
+        return self._names
+
+    def write(self, name, png):
+        if isinstance(self.archive, zipfile.ZipFile):
+            # PNG is already compressed
+            self.archive.writestr(name, png, zipfile.ZIP_STORED)
+        elif self.archive is not None:
+            info = tarfile.TarInfo(name)
+            info.size = len(png)
+            info.mtime = time.time()
+            self.archive.addfile(info, io.BytesIO(png))
+        else:
+            with open(os.path.join(self.path, name), "wb") as f:
+                f.write(png)
+        self._names.add(name)
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+
+def file_name(name, digest):
+    return f"{name}_{digest}.png" if name else f"{digest}.png"
+
+def generate_batch(csv_path, output, template=None, name_field=None, size=None, workers=None,
+                   best_mask=False, chunk_size=64):
+    """Generate a QR code PNG for every CSV row into `output`, in a process pool.
+
+    Files are named after a hash of the encoded data (prefixed with the
+    `name_field` column if given), so codes that already exist in the output
+    are skipped. Returns (generated, skipped, seconds).
+    """
+    start = time.perf_counter()
+    out = BatchOutput(output)
+    existing = out.names()
+    todo = {}
+    skipped = 0
+    for name, data in read_rows(csv_path, template, name_field):
+        target = file_name(name, content_hash(data))
+        if target in existing or target in todo:
+            skipped += 1
+        else:
+            todo[target] = data
+    mask_pattern = None if best_mask else MASK_PATTERN
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            pngs = pool.map(render_png, todo.values(), [size] * len(todo), [mask_pattern] * len(todo),
+                            chunksize=chunk_size)
+            for target, png in zip(todo, pngs):
+                out.write(target, png)
+    finally:
+        out.close()
+    return len(todo), skipped, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate QR codes: one random payment code, or a batch from a CSV.")
+    parser.add_argument("csv", nargs="?", help="CSV file with one code per row (e.g. ProductData.csv)")
+    parser.add_argument("-o", "--output", default="qr_codes", help="output directory, .zip or .tar archive")
+    parser.add_argument("--template", help="data to encode, with {column} placeholders (default: all columns)")
+    parser.add_argument("--name-field", help="column to prefix file names with")
+    parser.add_argument("--size", type=int, help="image width and height in pixels (default: 10 px per module)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--best-mask", action="store_true", help="pick the best mask pattern per code (slower)")
+    args = parser.parse_args(argv)
+
+    if args.csv is None:
+        # Example usage
+        qr_file = generate_random_payment_qr_code(args.output)
+        print(f"Random payment QR code generated: {qr_file}")
+        return
+
+    size = (args.size, args.size) if args.size else None
+    generated, skipped, seconds = generate_batch(args.csv, args.output, args.template, args.name_field, size,
+                                                 args.workers, args.best_mask)
+    rate = generated / seconds if seconds else 0.0
+    print(f"Generated {generated} QR codes into {args.output} ({skipped} already present) "
+          f"in {seconds:.1f} s: {rate:.0f} codes/s")
+
 if __name__ == "__main__":
-    # Example usage
-    qr_file = generate_random_payment_qr_code()
-    print(f"Random payment QR code generated: {qr_file}")
+    main()
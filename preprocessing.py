@@ -0,0 +1,22 @@
+import cv2
+import numpy as np
+
+
+class Preprocessor:
+    """Resizes a camera frame straight into a reusable float32 (1, H, W, 3) model input.
+
+    The returned array is the same buffer on every call, so it must be
+    consumed (predicted on) before the next frame is preprocessed.
+    """
+
+    def __init__(self, size=(150, 150)):
+        width, height = size
+        self.size = size
+        self._resized = np.empty((height, width, 3), np.uint8)
+        self._scale = np.float32(1 / 255.0)
+        self.buffer = np.empty((1, height, width, 3), np.float32)
+
+    def __call__(self, frame):
+        cv2.resize(frame, self.size, self._resized)
+        np.multiply(self._resized, self._scale, out=self.buffer[0])
+        return self.buffer
@@ -0,0 +1,137 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap scene-change detector based on downscaled grayscale frame differencing.
+
+    `threshold` is the mean absolute grey-level difference (0-255) against the
+    frame the last prediction was made on that counts as a change.
+    """
+
+    def __init__(self, threshold=8.0, size=(64, 48)):
+        self.threshold = threshold
+        self.size = size
+        self._reference = None
+
+    def changed(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        if self._reference is not None:
+            if cv2.mean(cv2.absdiff(gray, self._reference))[0] < self.threshold:
+                return False
+        # Compare against the last predicted frame, so slow drift still adds up
+        self._reference = gray
+        return True
+
+    def reset(self):
+        self._reference = None
+
+
+class Recognizer:
+    """Runs `predict(frame)` and reuses the last output while the scene is static."""
+
+    def __init__(self, predict, gate=None):
+        self.predict = predict
+        self.gate = gate
+        self.last_prediction = None
+        self.predictions_run = 0
+        self.predictions_skipped = 0
+
+    def __call__(self, frame):
+        if self.gate is not None and not self.gate.changed(frame) and self.last_prediction is not None:
+            self.predictions_skipped += 1
+            return self.last_prediction
+        try:
+            self.last_prediction = self.predict(frame)
+        except Exception:
+            self.last_prediction = None
+            if self.gate is not None:
+                self.gate.reset()
+            raise
+        self.predictions_run += 1
+        return self.last_prediction
+
+    def stats(self):
+        return {
+            "predictions_run": self.predictions_run,
+            "predictions_skipped": self.predictions_skipped,
+        }
+
+
+class TemporalVoter:
+    """Confirms a class from the last `window` prediction vectors instead of a single frame.
+
+    In "mean" mode a class is confirmed once at least `min_agree` frames are
+    buffered and their averaged probability for it reaches `threshold`; in
+    "majority" mode once `min_agree` buffered frames have it as top-1 with at
+    least `threshold` confidence. update() returns the confirmed class (or
+    None) and sets `just_confirmed` on the first confirmation of each
+    presentation: an item counts as presented while it stays top-1 with at
+    least `presence` confidence, so a vote that briefly dips below the
+    threshold does not confirm it twice. The time from the item showing up
+    to its confirmation is kept in `last_confirm_seconds`.
+    """
+
+    def __init__(self, window=5, min_agree=3, threshold=0.92, mode="mean", presence=0.5):
+        if mode not in ("mean", "majority"):
+            raise ValueError(f"Unknown voting mode {mode!r}, expected 'mean' or 'majority'")
+        self.window = window
+        self.min_agree = min(min_agree, window)
+        self.threshold = threshold
+        self.mode = mode
+        self.presence = presence
+        self._buffer = None
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.confirmed = None
+        self.just_confirmed = False
+        self.last_confirm_seconds = None
+        self._candidate = None
+        self._candidate_since = None
+        # Class already confirmed during the current presentation
+        self._announced = None
+
+    def update(self, probabilities):
+        probabilities = np.asarray(probabilities, np.float32)
+        if self._buffer is None or self._buffer.shape[1] != len(probabilities):
+            self._buffer = np.zeros((self.window, len(probabilities)), np.float32)
+            self.count = 0
+        self._buffer[self.count % self.window] = probabilities
+        self.count += 1
+        recent = self._buffer[:min(self.count, self.window)]
+
+        # When did the item now on top first appear?
+        top = int(np.argmax(probabilities))
+        if probabilities[top] < self.presence:
+            # The item left the view; showing it again is a new presentation
+            self._candidate = None
+            self._announced = None
+        elif top != self._candidate:
+            self._candidate = top
+            self._candidate_since = time.perf_counter()
+            if top != self._announced:
+                self._announced = None
+
+        if self.mode == "mean":
+            mean = recent.mean(axis=0)
+            winner = int(np.argmax(mean))
+            agreed = len(recent) >= self.min_agree and mean[winner] >= self.threshold
+        else:
+            votes = np.bincount(np.argmax(recent, axis=1)[recent.max(axis=1) >= self.threshold],
+                                minlength=recent.shape[1])
+            winner = int(np.argmax(votes))
+            agreed = votes[winner] >= self.min_agree
+        confirmed = winner if agreed else None
+
+        self.just_confirmed = confirmed is not None and confirmed != self._announced
+        if self.just_confirmed:
+            self._announced = confirmed
+            self.last_confirm_seconds = (time.perf_counter() - self._candidate_since
+                                         if self._candidate == confirmed else None)
+        self.confirmed = confirmed
+        return confirmed
@@ -0,0 +1,213 @@
+"""Low-confidence camera frames kept on disk for retraining the model.
+
+    python retraining_store.py export low_confidence retraining_data
+
+Frames the model was unsure about are written by a LowConfidenceStore as
+JPEGs named after their top-3 predictions. export() sorts them into one
+folder per predicted SKU, the layout load_image() in selfcheckoutmodel.py
+reads; review the folders and move misfiled images before training on them.
+Frames whose top class has no SKU in the catalog are not exported.
+"""
+import argparse
+import csv
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+from urllib.parse import quote, unquote
+
+import cv2
+import numpy as np
+
+
+def frame_name(timestamp, seq, top):
+    """'<ms>-<seq>+<label>=<p>+...jpg' for a frame and its top predictions [(label, probability), ...].
+
+    Labels are percent-encoded, so they never contain the '+' and '=' separators;
+    a None label (a class with no SKU) is stored empty.
+    """
+    guesses = "".join(f"+{quote('' if label is None else str(label), safe='')}={probability:.3f}"
+                      for label, probability in top)
+    return f"{int(timestamp * 1000):013d}-{seq:06d}{guesses}.jpg"
+
+
+def parse_name(filename):
+    """The [(label, probability), ...] encoded in a stored frame's file name; unmapped labels are None."""
+    top = []
+    for guess in os.path.splitext(filename)[0].split("+")[1:]:
+        label, _, probability = guess.rpartition("=")
+        top.append((unquote(label) or None, float(probability)))
+    return top
+
+
+class LowConfidenceStore:
+    """Samples below-threshold frames into a size-capped directory of JPEGs on a background thread.
+
+    offer() is called from the frame loop and never blocks: it takes at most
+    one frame every `min_interval` seconds, downscales it to `width` pixels
+    wide and drops it when `queue_size` frames are already waiting. The
+    writer encodes queued frames in batches and deletes the oldest files
+    whenever the store grows past `max_bytes`.
+    """
+
+    def __init__(self, directory, max_bytes=256 << 20, width=320, quality=90, min_interval=0.5, queue_size=16,
+                 batch_size=8, flush_interval=1.0):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.width = width
+        self.quality = quality
+        self.min_interval = min_interval
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(queue_size)
+        self.written = 0
+        self.dropped = 0
+        self._seq = 0
+        self._last_offer = 0.0
+        # Oldest first; names start with a millisecond timestamp
+        self._files = deque()
+        self._bytes = 0
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".jpg"):
+                size = os.path.getsize(os.path.join(directory, name))
+                self._files.append((name, size))
+                self._bytes += size
+        self.running = True
+        self._thread = threading.Thread(target=self._write_loop, name="low-confidence-writer", daemon=True)
+        self._thread.start()
+
+    def offer(self, frame, prediction, label=None):
+        """Queue `frame` (BGR) with its class probabilities; `label` maps a class index to a name such as a SKU.
+
+        Returns True if the frame was queued.
+        """
+        now = time.monotonic()
+        if now - self._last_offer < self.min_interval:
+            return False
+        self._last_offer = now
+        if self.queue.full():
+            self.dropped += 1
+            return False
+        prediction = np.asarray(prediction)
+        # Plain ints: sqlite3 does not match numpy integers, so catalog lookups would find nothing
+        classes = [int(i) for i in np.argsort(prediction)[::-1][:3]]
+        top = [(label(i) if label else i, float(prediction[i])) for i in classes]
+        height, width = frame.shape[:2]
+        if width > self.width:
+            small = cv2.resize(frame, (self.width, max(1, height * self.width // width)), interpolation=cv2.INTER_AREA)
+        else:
+            # The caller may draw on its frame after this returns
+            small = frame.copy()
+        try:
+            self.queue.put_nowait((time.time(), small, top))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _collect(self):
+        try:
+            batch = [self.queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and self.running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_loop(self):
+        while self.running or not self.queue.empty():
+            batch = self._collect()
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    print(f"Error writing low-confidence frames to {self.directory}: {e}")
+
+    def _write(self, batch):
+        for timestamp, frame, top in batch:
+            ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                continue
+            name = frame_name(timestamp, self._seq, top)
+            self._seq = (self._seq + 1) % 1000000
+            with open(os.path.join(self.directory, name), "wb") as f:
+                f.write(data.tobytes())
+            self._files.append((name, len(data)))
+            self._bytes += len(data)
+            self.written += 1
+        while self._bytes > self.max_bytes and self._files:
+            name, size = self._files.popleft()
+            self._bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        return {"stored": len(self._files), "bytes": self._bytes, "written": self.written, "dropped": self.dropped}
+
+    def close(self):
+        """Write whatever is still queued and stop the writer."""
+        self.running = False
+        self._thread.join(timeout=5.0)
+
+
+def export(directory, out_dir):
+    """Copy stored frames into `out_dir/<top label>/` folders plus a predictions.csv for review.
+
+    Returns the number of frames exported per label.
+    """
+    counts = {}
+    rows = []
+    unmapped = 0
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".jpg"):
+            continue
+        top = parse_name(name)
+        if not top:
+            continue
+        label = top[0][0]
+        if label is None:
+            unmapped += 1
+            continue
+        os.makedirs(os.path.join(out_dir, label), exist_ok=True)
+        shutil.copy2(os.path.join(directory, name), os.path.join(out_dir, label, name))
+        counts[label] = counts.get(label, 0) + 1
+        rows.append([os.path.join(label, name)] + ["" if value is None else value for guess in top for value in guess])
+    if rows:
+        with open(os.path.join(out_dir, "predictions.csv"), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["file", "label_1", "p_1", "label_2", "p_2", "label_3", "p_3"])
+            writer.writerows(rows)
+    if unmapped:
+        print(f"Skipped {unmapped} frame(s) whose top class has no SKU in the catalog")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="sort stored frames into per-SKU training folders")
+    export_parser.add_argument("store", help="directory the checkout writes low-confidence frames to")
+    export_parser.add_argument("out", help="output directory, one sub-folder per SKU")
+    args = parser.parse_args()
+
+    counts = export(args.store, args.out)
+    for label, count in sorted(counts.items()):
+        print(f"{label}: {count} frame(s) in {os.path.join(args.out, label)}")
+    if not counts:
+        print(f"No frames found in {args.store}")
+
+
+if __name__ == "__main__":
+    main()
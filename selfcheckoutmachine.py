@@ -1,11 +1,16 @@
 import cv2 
-import numpy as np
-import pandas as pd
-from keras.models import load_model
-from keras.preprocessing.image import img_to_array
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
+from frame_pipeline import FramePipeline
+from display import FrameDisplay
+from inference import load_engine
+from inference_server import RemoteEngine
+from catalog import Catalog
+from cart import format_cents
+from checkout_engine import CheckoutEngine
+from metrics import Metrics
+from recognition import TemporalVoter
+from retraining_store import LowConfidenceStore
 
 training_data = [
     "V:/VIT/Project/Self checkout machine virtual keyboard with opencv/TrainingDataforSelfCheckoutMachine/TrainingData/1001",
@@ -14,108 +19,142 @@ training_data = [
 ]
 
 product_data_path = "V:/VIT/Project/Self checkout machine virtual keyboard with opencv/TrainingDataforSelfCheckoutMachine/ProductData.csv"
-product_data = pd.read_csv(product_data_path)
-product_info = {
-    row['Product_ID']: {
-      'name': row['Product_Name'],
-      'price': float(row['Price'].replace('$','')),
-      'discount': float(row['Discount'].replace("%",'')) / 100.0
-    } for index, row in product_data.iterrows()
-}
-model = load_model("self_checkout_model.h5")
-current_discounted_price = 0
-total_price = 0
-count_products = 0
+# Any model saved by selfcheckoutmodel.py: the baseline or compact .h5, or an .int8.tflite export
+model_path = "self_checkout_model.h5"
+catalog = Catalog.open(product_data_path, model_path)
+# Inference backend: "keras" (model.predict), "compiled" (traced call) or "tflite"
+inference_backend = "compiled"
+inference_threads = 2
+# (host, port) of a shared inference_server.py; predictions fall back to a local model while it is down
+inference_server = None
+if inference_server:
+    engine = RemoteEngine(inference_server, lambda: load_engine(inference_backend, model_path, inference_threads))
+else:
+    engine = load_engine(inference_backend, model_path, inference_threads)
+# Run capture and recognition on background threads instead of the Tk loop
+threaded_capture = True
+# Upper bound on how often the camera preview is redrawn
+display_fps = 30
+# Mean grey-level change (0-255) that makes the model run again; None disables gating
+motion_threshold = 8.0
+# Confirm a product only once it wins a vote over the last vote_window frames; None trusts every
+# frame. auto_scan adds each confirmed product without pressing Scan, once per presentation
+vote_window = 5
+vote_min_agree = 3
+auto_scan = False
+# Keep a size-capped sample of frames the model is unsure about here for retraining; None keeps nothing
+low_confidence_dir = None
+# Stage timings: draw p50/p95/p99 on the video, and/or export them for Prometheus
+# as a textfile or on http://127.0.0.1:<port>/metrics
+metrics_overlay = False
+metrics_textfile = None
+metrics_port = None
+metrics = Metrics()
+metrics.start_export(metrics_textfile, metrics_port)
 
 cap = cv2.VideoCapture(0)
-def recognize_product(frame, model):
-    img = cv2.resize(frame, (150,150))
-    img = img.astype("float") / 255.0
-    img = img_to_array(img)
-    img = np.expand_dims(img, axis=0)
-    prediction = model.predict(img)
-    confidence_threshold = 0.92
-    product_class = np.argmax(prediction[0])
-    confidence = prediction[0][product_class]
-    if confidence < confidence_threshold:
-      return "No product identified", None, None, None
-    product_id = int(list(product_info.keys())[product_class])
-    product = product_info[product_id]
-    discounted_price = product['price'] * (1 - product['discount'])
-    return product['name'], product['price'], product['discount'], discounted_price
+# Cart, recognition and payment state; this script only draws it
+voter = TemporalVoter(vote_window, vote_min_agree) if vote_window else None
+low_confidence = LowConfidenceStore(low_confidence_dir) if low_confidence_dir else None
+checkout = CheckoutEngine(engine, catalog, motion_threshold, metrics=metrics, voter=voter, auto_scan=auto_scan,
+                          low_confidence=low_confidence)
 
 def open_payment_window():
     def process_payment():
         try:
-            entered_amount = float(amount_entry.get())
-            if entered_amount >= total_price:
-                change = entered_amount - total_price
-                messagebox.showinfo("Payment", f"Thanks for making the purchase. Your change is ${change:.2f}.")
-            else:
-                messagebox.showwarning("Payment", " Balance is not enough, please try again.")
+            payment = checkout.pay(amount_entry.get())
         except ValueError:
             messagebox.showwarning("Payment", "Invalid amount entered, please enter valid number")
+            return
+        if payment.paid:
+            messagebox.showinfo("Payment", f"Thanks for making the purchase. Your change is {format_cents(payment.change_cents)}.")
+        else:
+            messagebox.showwarning("Payment", " Balance is not enough, please try again.")
     payment_window = tk.Toplevel(root)
     payment_window.title("Payment")
-    tk.Label(payment_window, text=f"Total Price: ${total_price:.2f}").pack(pady=10)
+    tk.Label(payment_window, text=f"Total Price: {format_cents(checkout.cart.total_cents)}").pack(pady=10)
     tk.Label(payment_window, text="Enter Amount:").pack(pady=5)
     amount_entry = tk.Entry(payment_window)
     amount_entry.pack(pady=5)
     tk.Button(payment_window, text="Pay", command=process_payment, font=('Helvetica',16)).pack(pady=20)
 
+def annotate_frame(frame, product):
+    if product is None:
+        text = "No product identified"
+    else:
+        discounted_price = product['price'] * (1 - product['discount'])
+        text = (
+            f"Product: {product['name']}\n"
+            f"Price: {product['price']:.2f}\n"
+            f"Discount: {product['discount']*100:.0f}%\n"
+            f"Price After Discount: ${discounted_price:.2f}\n"
+            f"Total Products: {len(checkout.cart)}\n"
+            f"Total Price: {format_cents(checkout.cart.total_cents)}"
+        )
+
+    y0, dy = 50, 30
+    for i, line in enumerate(text.split('\n')):
+        y = y0 + i * dy
+        cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,255,0), 2, cv2.LINE_AA)
+    frame = cv2.resize(frame, (640,480))
+    if metrics_overlay:
+        metrics.draw_overlay(frame)
+    return frame
+
+def annotate_pipeline_frame(frame, product):
+    if product is None and checkout.recognizer.last_prediction is None:
+        # Nothing recognized yet
+        return cv2.resize(frame, (640,480))
+    return annotate_frame(frame, product)
+
 def update_frame():
-    global current_discounted_price, total_price, count_products
-    ret, frame = cap.read()
+    checkout.apply_auto_scans()
+    if pipeline:
+        # Capture and recognition run in the pipeline threads; only render here
+        frame = pipeline.latest_frame()
+        if frame is not None:
+            display.show(frame)
+        root.after(10, update_frame)
+        return
+    with metrics.time("capture"):
+        ret, frame = cap.read()
     if not ret:
         return
     try:
-        product_name, product_price, discount, discounted_price = recognize_product(frame, model)
-        current_discounted_price = discounted_price
-        if product_name == "No product identified":
-            text = product_name
-        else:
-            text = (
-                f"Product: {product_name}\n"
-                f"Price: {product_price:.2f}\n"
-                f"Discount: {discount*100:.0f}%\n"
-                f"Price After Discount: ${discounted_price:.2f}\n"
-                f"Total Products: {count_products}\n"
-                f"Total Price: ${total_price:.2f}"
-            )
-
-        y0, dy = 50, 30
-        for i, line in enumerate(text.split('\n')):
-            y = y0 + i * dy
-            cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,255,0), 2, cv2.LINE_AA)
-        
-        frame = cv2.resize(frame, (640,480))
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(frame_rgb)
-        img_tk = ImageTk.PhotoImage(image=img)
-        video_label.img_tk = img_tk
-        video_label.config(image=img_tk)
+        product = checkout.feed_frame(frame)
+        with metrics.time("annotate"):
+            frame = annotate_frame(frame, product)
+        display.show(frame)
     except Exception as e:
         print(f"Error during recognition: {e}")
     root.after(10, update_frame)
 
 def scan_product():
-    global current_discounted_price, total_price, count_products
-    count_products += 1
-    total_price += current_discounted_price
+    checkout.scan()
 
 root = tk.Tk()
 root.title("Self Checkout Machine")
 root.geometry("800x600")
 video_label = tk.Label(root)
 video_label.pack()
+display = FrameDisplay(video_label, display_fps, metrics)
 scan_button = tk.Button(root, text="Scan Product", command=scan_product, font=('Helvetica',16,'bold'), width=20, height=2)
 scan_button.pack(side=tk.LEFT, padx=20, pady=10)
 pay_button = tk.Button(root, text="Payment", command=open_payment_window, font=('Helvetica',16,'bold'), width=20, height=2)
 pay_button.pack(side=tk.RIGHT, padx=20, pady=10)
 
+pipeline = None
+if threaded_capture:
+    pipeline = FramePipeline(cap, checkout.feed_frame, annotate_pipeline_frame, metrics=metrics)
+    pipeline.start()
 update_frame()
 
 def on_closing():
+    if pipeline:
+        pipeline.stop()
+    if low_confidence:
+        low_confidence.close()
+    print(f"Recognition: {checkout.stats()}")
     cap.release()
     cv2.destroyAllWindows()
     root.destroy()
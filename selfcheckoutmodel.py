@@ -1,16 +1,31 @@
 import os 
+import math
 import cv2 
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.model_selection import train_test_split
 from keras.models import Sequential
-from keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout
-from keras.utils import to_categorical
+from keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout, SeparableConv2D, GlobalAveragePooling2D
+from catalog import save_class_index
+from dataset import list_samples, batch_generator
+from dataset_cache import DatasetCache
+from inference import export_int8_tflite
 
 training_data = [
     "V:/VIT/Project/Self checkout machine virtual keyboard with opencv/TrainingDataforSelfCheckoutMachine/TrainingData/1001",
     "V:/VIT/Project/Self checkout machine virtual keyboard with opencv/TrainingDataforSelfCheckoutMachine/TrainingData/1002",
     "V:/VIT/Project/Self checkout machine virtual keyboard with opencv/TrainingDataforSelfCheckoutMachine/TrainingData/1003" 
 ]
+# Preprocessed image cache; set to None to decode the images on every run
+cache_dir = "dataset_cache"
+test_size = 0.2
+# "baseline" is the original Flatten + Dense(128) model; "compact" uses depthwise-separable
+# convolutions and global average pooling and is a small fraction of the size
+architecture = "baseline"
+model_paths = {"baseline": "self_checkout_model.h5", "compact": "self_checkout_compact.h5"}
+# Also export a post-training int8 TFLite model (<model>.int8.tflite) for kiosk CPUs
+quantize = True
+calibration_images = 200
 
 def load_image(training_data):
     images = []
@@ -29,22 +44,80 @@ def load_image(training_data):
                     print(f"Error loading image {os.path.join(folder_path, filename)}: {e}")
     return np.array(images), np.array(labels)
 
-images, labels = load_image(training_data)
-X_train, X_test, y_train, y_test = train_test_split(images, labels, test_size=0.2, random_state=42)
-X_train = X_train.astype('float32') / 255
-X_test = X_test.astype('float32') / 255
-num_classes = len(training_data)
-y_train = to_categorical(y_train, num_classes=num_classes)
-y_test = to_categorical(y_test, num_classes=num_classes)
-model = Sequential()
-model.add(Conv2D(32, kernel_size=(3,3), activation='relu', input_shape=(150,150,3)))
-model.add(Conv2D(64, kernel_size=(3,3), activation='relu'))
-model.add(MaxPooling2D(pool_size=(2,2)))
-model.add(Dropout(0.25))
-model.add(Flatten())
-model.add(Dense(128, activation='relu'))
-model.add(Dropout(0.5))
-model.add(Dense(3, activation='softmax'))
-model.compile(loss="categorical_crossentropy", optimizer="adam", metrics=["accuracy"])
-model.fit(X_train, y_train, batch_size=32, epochs=50, verbose=1, validation_data=(X_test, y_test))
-model.save("self_checkout_model.h5")
+def build_model(num_classes, architecture="baseline"):
+    if architecture == "compact":
+        return build_compact_model(num_classes)
+    model = Sequential()
+    model.add(Conv2D(32, kernel_size=(3,3), activation='relu', input_shape=(150,150,3)))
+    model.add(Conv2D(64, kernel_size=(3,3), activation='relu'))
+    model.add(MaxPooling2D(pool_size=(2,2)))
+    model.add(Dropout(0.25))
+    model.add(Flatten())
+    model.add(Dense(128, activation='relu'))
+    model.add(Dropout(0.5))
+    model.add(Dense(num_classes, activation='softmax'))
+    model.compile(loss="categorical_crossentropy", optimizer="adam", metrics=["accuracy"])
+    return model
+
+def build_compact_model(num_classes):
+    model = Sequential()
+    model.add(Conv2D(32, kernel_size=(3,3), strides=(2,2), padding='same', activation='relu', input_shape=(150,150,3)))
+    model.add(SeparableConv2D(64, kernel_size=(3,3), padding='same', activation='relu'))
+    model.add(MaxPooling2D(pool_size=(2,2)))
+    model.add(SeparableConv2D(128, kernel_size=(3,3), padding='same', activation='relu'))
+    model.add(MaxPooling2D(pool_size=(2,2)))
+    model.add(SeparableConv2D(128, kernel_size=(3,3), padding='same', activation='relu'))
+    model.add(GlobalAveragePooling2D())
+    model.add(Dropout(0.3))
+    model.add(Dense(num_classes, activation='softmax'))
+    model.compile(loss="categorical_crossentropy", optimizer="adam", metrics=["accuracy"])
+    return model
+
+def single_images(batches, count):
+    """Split batches into (1, 150, 150, 3) inputs, e.g. for int8 calibration."""
+    produced = 0
+    for x, _ in batches:
+        for image in x:
+            if produced == count:
+                return
+            yield image[np.newaxis]
+            produced += 1
+
+if __name__ == "__main__":
+    num_classes = len(training_data)
+    batch_size = 32
+    model_path = model_paths[architecture]
+    model = build_model(num_classes, architecture)
+    with ProcessPoolExecutor() as pool:
+        if cache_dir:
+            # Decoded images are cached under cache_dir; only new or changed photos are processed
+            cache = DatasetCache(cache_dir)
+            added, removed = cache.update(training_data, pool)
+            print(f"Dataset cache: {len(cache)} images ({added} added, {removed} removed)")
+            train_entries, test_entries = cache.split(test_size)
+            train_steps = math.ceil(len(train_entries) / batch_size)
+            test_steps = math.ceil(len(test_entries) / batch_size)
+            train_batches = cache.batches(train_entries, num_classes, batch_size)
+            calibration_batches = lambda: cache.batches(train_entries, num_classes, batch_size)
+            test_batches = cache.batches(test_entries, num_classes, batch_size, shuffle=False) if test_steps else None
+        else:
+            # Only file paths are split and held in memory; images are decoded batch by batch
+            paths, labels = list_samples(training_data)
+            train_paths, test_paths, y_train, y_test = train_test_split(paths, labels, test_size=test_size, random_state=42)
+            train_steps = math.ceil(len(train_paths) / batch_size)
+            test_steps = math.ceil(len(test_paths) / batch_size)
+            train_batches = batch_generator(train_paths, y_train, num_classes, batch_size, pool=pool)
+            calibration_batches = lambda: batch_generator(train_paths, y_train, num_classes, batch_size, pool=pool)
+            test_batches = batch_generator(test_paths, y_test, num_classes, batch_size, shuffle=False, pool=pool) if test_steps else None
+        if test_batches is None:
+            print("No images in the validation split; training without validation")
+        model.fit(train_batches, steps_per_epoch=train_steps, epochs=50, verbose=1,
+                  validation_data=test_batches, validation_steps=test_steps or None)
+        model.save(model_path)
+        # Class index i was trained on the i-th folder, which is named after its SKU
+        class_skus = [os.path.basename(folder) for folder in training_data]
+        save_class_index(model_path, class_skus)
+        if quantize:
+            # A fresh generator: model.fit() may still hold train_batches
+            int8_path = export_int8_tflite(model_path, single_images(calibration_batches(), calibration_images))
+            save_class_index(int8_path, class_skus)
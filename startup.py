@@ -0,0 +1,44 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """Wall-clock breakdown of start-up.
+
+        with startup.step("load model"):
+            ...
+
+    Records how long each import or load step took, on which thread, and
+    when it finished relative to `start` (the process start if given
+    time.perf_counter() from the top of the entry script). mark() records a
+    milestone such as the first frame shown.
+    """
+
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.steps = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.steps.append((name, threading.current_thread().name, end - begin, end - self.start))
+
+    def mark(self, name):
+        with self._lock:
+            self.steps.append((name, threading.current_thread().name, None, time.perf_counter() - self.start))
+
+    def report(self):
+        lines = [f"{'startup step':30s} {'thread':12s} {'took s':>7s} {'done at s':>9s}"]
+        with self._lock:
+            steps = sorted(self.steps, key=lambda step: step[3])
+        for name, thread, duration, done in steps:
+            took = "" if duration is None else f"{duration:7.3f}"
+            lines.append(f"{name:30s} {thread[:12]:12s} {took:>7s} {done:9.3f}")
+        return "\n".join(lines)
@@ -1,17 +1,32 @@
-import cv2
-import numpy as np
-import pandas as pd
-from keras.models import load_model
-from keras.preprocessing.image import img_to_array
-import tkinter as tk
-from tkinter import ttk, messagebox
-from PIL import Image, ImageTk,ImageDraw
-import mediapipe as mp
 import time
-import qrcode
-import random
-import string
-import os
+process_start = time.perf_counter()
+import threading
+from startup import StartupProfile
+
+# Start-up is timed step by step; the model, catalog, MediaPipe and qrcode load on
+# background threads after the window is up
+startup = StartupProfile(process_start)
+with startup.step("import tkinter"):
+    import tkinter as tk
+    from tkinter import ttk, messagebox
+with startup.step("import cv2, numpy, PIL"):
+    import cv2
+    import numpy as np
+    from PIL import ImageTk
+with startup.step("import app modules"):
+    from frame_pipeline import FramePipeline, LatestFrameQueue
+    from inference import load_engine, sample_inputs
+    from catalog import Catalog
+    from cart import format_cents
+    from checkout_engine import CheckoutEngine
+    from detection import ItemDetector
+    from bill_view import BillView
+    from keypad import get_keypad
+    from display import FrameDisplay
+    from gesture_keyboard import GestureKeyboard, GestureKeyboardSession
+    from metrics import Metrics
+    from recognition import TemporalVoter
+    from retraining_store import LowConfidenceStore
 
 
 # Constants
@@ -30,53 +45,51 @@ KEY_HEIGHT = 60
 X_GAP = 20
 Y_GAP = 15
 PADDING = 10
+# Run capture and recognition on background threads instead of the Tk loop
+THREADED_CAPTURE = True
+# Upper bound on how often the camera preview is redrawn
+DISPLAY_FPS = 30
+# Mean grey-level change (0-255) that makes the model run again; None disables gating
+MOTION_THRESHOLD = 8.0
+# Inference backend: "keras" (model.predict), "compiled" (traced call) or "tflite"
+INFERENCE_BACKEND = "compiled"
+INFERENCE_THREADS = 2
+# (host, port) of a shared inference_server.py; predictions fall back to a local model while it is down
+INFERENCE_SERVER = None
+# Recognize several items per frame ("contours" or "grid" regions, classified in one batch)
+# and add them all with one Scan press; None classifies the whole frame as one product
+MULTI_ITEM = None
+# Confirm a single item only once it wins a vote over the last VOTE_WINDOW frames ("mean" of
+# the probabilities or "majority" of top-1 labels, needing VOTE_MIN_AGREE frames); None trusts
+# every frame on its own. AUTO_SCAN adds each confirmed item without pressing Scan, once per presentation
+VOTE_WINDOW = 5
+VOTE_MIN_AGREE = 3
+VOTE_MODE = "mean"
+CONFIDENCE_THRESHOLD = 0.92
+AUTO_SCAN = False
+# Keep a sample of frames the model is unsure about in this directory, capped at
+# LOW_CONFIDENCE_MAX_MB, for retraining (see retraining_store.py); None keeps nothing
+LOW_CONFIDENCE_DIR = None
+LOW_CONFIDENCE_MAX_MB = 256
+# Warm MediaPipe Hands for the gesture keyboard; it reads frames from the checkout camera
+GESTURE_KEYBOARD = True
+# Stage timings: draw p50/p95/p99 on the camera view, and/or export them for Prometheus
+# as a textfile (for node_exporter's textfile collector) or on http://127.0.0.1:<port>/metrics
+METRICS_OVERLAY = False
+METRICS_TEXTFILE = None
+METRICS_PORT = None
+# Payment QR codes are rendered in memory at this size; set a directory to also keep them as PNGs
+QR_SIZE = (200, 200)
+QR_ARCHIVE_DIR = None
+# Any model saved by selfcheckoutmodel.py: the baseline or compact .h5, or an .int8.tflite export
+MODEL_PATH = "self_checkout_model.h5"
 
-# Load product data and model
-product_data = pd.read_csv("ProductData.csv")
-product_info = {
-    row['Product_ID']: {
-        'name': row['Product_Name'],
-        'price': float(row['Price'].replace('$', '')),
-        'discount': float(row['Discount'].replace("%", '')) / 100.0
-    } for index, row in product_data.iterrows()
-}
-model = load_model("self_checkout_model.h5")
-
-def generate_random_string(length=10):
-    """Generate a random string of letters and digits."""
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
-
-def generate_qr_code(data, file_name="payment_qr.png"):
-    """Generate a QR code from the provided data."""
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-
-    img = qr.make_image(fill_color="black", back_color="white")
-    img.save(file_name)
-    print(f"QR code saved as {file_name}")
-
-def generate_random_payment_qr_code(directory="qr_codes"):
-    """Generate a random QR code for payment and save it to a file."""
-    # Ensure the directory exists
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-
-    # Generate random payment data
-    random_payment_id = generate_random_string(12)  # e.g., a random transaction ID
-    payment_data = f"payment_id:{random_payment_id};amount:100.00"  # Example payment info
 
-    # Create file name based on the payment ID
-    file_name = os.path.join(directory, f"{random_payment_id}.png")
-
-    # Generate and save the QR code
-    generate_qr_code(payment_data, file_name)
-    return file_name
+def create_inference_engine():
+    if INFERENCE_SERVER:
+        from inference_server import RemoteEngine
+        return RemoteEngine(INFERENCE_SERVER, lambda: load_engine(INFERENCE_BACKEND, MODEL_PATH, INFERENCE_THREADS))
+    return load_engine(INFERENCE_BACKEND, MODEL_PATH, INFERENCE_THREADS)
 
 class SelfCheckoutSystem:
     def __init__(self, master):
@@ -84,17 +97,89 @@ class SelfCheckoutSystem:
         self.master.title("Self-Checkout System")
         self.master.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}")
         
-        self.current_product = None
-        self.scanned_products = []
-        self.total_price = 0
-        self.cap = cv2.VideoCapture(0)
+        # Cart, recognition and payment live in the headless engine; this class only draws it
+        self.metrics = Metrics()
+        self.metrics.start_export(METRICS_TEXTFILE, METRICS_PORT)
+        # The model and catalog are attached once loaded; until then nothing is recognized
+        detector = ItemDetector(MULTI_ITEM) if MULTI_ITEM else None
+        self.low_confidence = (LowConfidenceStore(LOW_CONFIDENCE_DIR, LOW_CONFIDENCE_MAX_MB << 20)
+                               if LOW_CONFIDENCE_DIR else None)
+        voter = TemporalVoter(VOTE_WINDOW, VOTE_MIN_AGREE, CONFIDENCE_THRESHOLD, VOTE_MODE) if VOTE_WINDOW else None
+        self.checkout = CheckoutEngine(None, None, MOTION_THRESHOLD, CONFIDENCE_THRESHOLD, metrics=self.metrics,
+                                       detector=detector, voter=voter, auto_scan=AUTO_SCAN,
+                                       low_confidence=self.low_confidence)
+        self.cart = self.checkout.cart
+        self.bill_view = None
+        self.cap = None
         self.final_text = ""
-        self.last_key = None
-        self.last_press_time = time.time()
+        self.pipeline = None
+        # Latest-frame queues of raw camera frames for other consumers (the gesture keyboard)
+        self.frame_subscribers = []
+        self.qr_pool = None
+        # Built by load_extras or by the first QR payment, whichever comes first
+        self.qr_pool_lock = threading.Lock()
+        self.gesture_keyboard = None
+        self.gesture_session = None
+        self.first_frame_shown = False
         
         self.setup_ui()
+        startup.mark("window created")
+        self.loading = [self.open_camera, self.load_recognition, self.load_extras]
+        self.loading_lock = threading.Lock()
+        for load in list(self.loading):
+            threading.Thread(target=self.run_loader, args=(load,), name=load.__name__, daemon=True).start()
         self.update_frame()
     
+    def run_loader(self, load):
+        try:
+            load()
+        except Exception as e:
+            print(f"Error during start-up ({load.__name__}): {e}")
+        with self.loading_lock:
+            self.loading.remove(load)
+            done = not self.loading
+        if done:
+            print(startup.report())
+    
+    def open_camera(self):
+        with startup.step("open camera"):
+            cap = cv2.VideoCapture(0)
+        if THREADED_CAPTURE:
+            self.pipeline = FramePipeline(cap, self.checkout.feed_frame, self.annotate_frame,
+                                          frame_size=(WEBCAM_WIDTH, WEBCAM_HEIGHT),
+                                          subscribers=self.frame_subscribers, metrics=self.metrics)
+            self.pipeline.start()
+        self.cap = cap
+    
+    def load_recognition(self):
+        with startup.step("load catalog"):
+            self.checkout.catalog = Catalog.open("ProductData.csv", MODEL_PATH)
+        with startup.step("load model"):
+            inference = create_inference_engine()
+        # The first call traces the graph / allocates tensors; pay for it before the first customer
+        with startup.step("warm up model"):
+            inference.predict(sample_inputs(1)[0])
+        self.checkout.inference = inference
+    
+    def load_extras(self):
+        with startup.step("payment QR pool"):
+            self.get_qr_pool()
+        if GESTURE_KEYBOARD:
+            # Created once so opening the keyboard does not pay for MediaPipe's start-up
+            with startup.step("import mediapipe"):
+                import mediapipe as mp
+            with startup.step("warm up MediaPipe Hands"):
+                hands = mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.9, min_tracking_confidence=0.9)
+                hands.process(np.zeros((WEBCAM_HEIGHT, WEBCAM_WIDTH, 3), np.uint8))
+            self.gesture_keyboard = GestureKeyboard(hands, metrics=self.metrics)
+    
+    def get_qr_pool(self):
+        with self.qr_pool_lock:
+            if self.qr_pool is None:
+                from payment_qr import PaymentQRPool
+                self.qr_pool = PaymentQRPool(QR_SIZE, archive_dir=QR_ARCHIVE_DIR)
+            return self.qr_pool
+    
     def setup_ui(self):
         self.style = ttk.Style()
         self.style.theme_use('clam')
@@ -107,6 +192,7 @@ class SelfCheckoutSystem:
         
         self.webcam_label = ttk.Label(self.main_frame)
         self.webcam_label.grid(row=0, column=0, columnspan=2, padx=5, pady=5)
+        self.display = FrameDisplay(self.webcam_label, DISPLAY_FPS, self.metrics)
         
         self.info_frame = ttk.Frame(self.main_frame, padding="10")
         self.info_frame.grid(row=1, column=0, columnspan=2, sticky="ew", padx=5, pady=5)
@@ -125,141 +211,119 @@ class SelfCheckoutSystem:
         
         self.show_bill_button = ttk.Button(self.main_frame, text="Show Bill", command=self.show_bill)
         self.show_bill_button.grid(row=2, column=1, padx=5, pady=5, sticky="ew")
+        
+        self.undo_button = ttk.Button(self.main_frame, text="Undo Last Scan", command=self.undo_scan)
+        self.undo_button.grid(row=3, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+    
+    def annotate_frame(self, frame, product):
+        if not self.checkout.ready:
+            cv2.putText(frame, "Recognition starting...", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        elif self.checkout.detector:
+            self.annotate_items(frame)
+        elif product:
+            cv2.putText(frame, f"Product: {product['name']}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+            cv2.putText(frame, f"Price: ${product['price']:.2f}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        else:
+            cv2.putText(frame, "No product identified", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        if METRICS_OVERLAY:
+            self.metrics.draw_overlay(frame)
+        return frame
     
-    def recognize_product(self, frame):
-        img = cv2.resize(frame, (150, 150))
-        img = img.astype("float") / 255.0
-        img = img_to_array(img)
-        img = np.expand_dims(img, axis=0)
-        prediction = model.predict(img)
-        confidence_threshold = 0.92
-        product_class = np.argmax(prediction[0])
-        confidence = prediction[0][product_class]
-        if confidence < confidence_threshold:
-            return None
-        product_id = int(list(product_info.keys())[product_class])
-        return product_info[product_id]
+    def annotate_items(self, frame):
+        items = self.checkout.current_items
+        if not items:
+            cv2.putText(frame, "No product identified", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            return
+        # Boxes are in camera-frame pixels; the display frame may be smaller
+        width, height = self.checkout.items_frame_size
+        sx, sy = frame.shape[1] / width, frame.shape[0] / height
+        for item in items:
+            x0, y0, x1, y1 = item.box
+            top_left, bottom_right = (int(x0 * sx), int(y0 * sy)), (int(x1 * sx), int(y1 * sy))
+            cv2.rectangle(frame, top_left, bottom_right, (0, 255, 0), 2)
+            cv2.putText(frame, f"{item.product['name']} ${item.product['price']:.2f}", (top_left[0] + 4, top_left[1] + 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        cv2.putText(frame, f"{len(items)} item(s) in view", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
     
     def update_frame(self):
-        ret, frame = self.cap.read()
-        if not ret:
+        # Items confirmed on the recognition thread are added here, on the Tk thread
+        lines = self.checkout.apply_auto_scans()
+        if lines:
+            self.update_info_labels(lines[-1])
+        if self.pipeline:
+            # Capture and recognition run in the pipeline threads; only render here
+            frame = self.pipeline.latest_frame()
+            if frame is not None:
+                self.show_frame(frame)
+            self.master.after(10, self.update_frame)
+            return
+        if self.cap is None:
+            # Camera still opening
             self.master.after(10, self.update_frame)
             return
         
-        frame = cv2.resize(frame, (WEBCAM_WIDTH, WEBCAM_HEIGHT))
-        product = self.recognize_product(frame)
-        self.current_product = product
-        
-        if product:
-            cv2.putText(frame, f"Product: {product['name']}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.putText(frame, f"Price: ${product['price']:.2f}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        else:
-            cv2.putText(frame, "No product identified", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        with self.metrics.time("capture"):
+            ret, frame = self.cap.read()
+        if not ret:
+            self.master.after(10, self.update_frame)
+            return
+        for frames in self.frame_subscribers:
+            frames.put(frame)
         
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(frame_rgb)
-        img_tk = ImageTk.PhotoImage(image=img)
-        self.webcam_label.img_tk = img_tk
-        self.webcam_label.config(image=img_tk)
+        # Recognize on the camera frame so it is resized only once, straight to the model input
+        product = self.checkout.feed_frame(frame)
+        with self.metrics.time("annotate"):
+            frame = self.annotate_frame(cv2.resize(frame, (WEBCAM_WIDTH, WEBCAM_HEIGHT)), product)
+        self.show_frame(frame)
         
         self.master.after(10, self.update_frame)
     
+    def show_frame(self, frame):
+        if self.display.show(frame) and not self.first_frame_shown:
+            self.first_frame_shown = True
+            startup.mark("first frame shown")
+    
     def scan_product(self):
-        if self.current_product:
-            self.scanned_products.append(self.current_product)
-            self.total_price += self.current_product['price'] * (1 - self.current_product['discount'])
+        lines = self.checkout.scan_all()
+        if lines:
+            self.update_info_labels(lines[-1])
+    
+    def undo_scan(self):
+        if self.checkout.undo() is not None:
             self.update_info_labels()
     
-    def update_info_labels(self):
-        self.product_label.config(text=f"Product: {len(self.scanned_products)} item(s)")
-        self.price_label.config(text=f"Last Price: ${self.current_product['price']:.2f}")
-        self.total_label.config(text=f"Total: ${self.total_price:.2f}")
+    def update_info_labels(self, line=None):
+        self.product_label.config(text=f"Product: {len(self.cart)} item(s)")
+        if line is not None:
+            self.price_label.config(text=f"Last Price: {format_cents(line.unit_cents)}")
+        self.total_label.config(text=f"Total: {format_cents(self.cart.total_cents)}")
     
     def show_bill(self):
-        bill_window = tk.Toplevel(self.master)
-        bill_window.title("Bill Summary")
-        
-        bill_frame = ttk.Frame(bill_window, padding="10")
-        bill_frame.pack(expand=True, fill=tk.BOTH)
-        
-        columns = ('product', 'price', 'quantity', 'discount', 'discounted_price', 'total')
-        tree = ttk.Treeview(bill_frame, columns=columns, show='headings')
-        tree.heading('product', text='Product')
-        tree.heading('price', text='Price')
-        tree.heading('quantity', text='Quantity')
-        tree.heading('discount', text='Discount')
-        tree.heading('discounted_price', text='Discounted Price')
-        tree.heading('total', text='Total')
-        
-        product_counts = {}
-        for product in self.scanned_products:
-            if product['name'] in product_counts:
-                product_counts[product['name']] += 1
-            else:
-                product_counts[product['name']] = 1
-        
-        for product_name, quantity in product_counts.items():
-            product = next(p for p in self.scanned_products if p['name'] == product_name)
-            price = product['price']
-            discount = product['discount']
-            discounted_price = price * (1 - discount)
-            total = quantity * discounted_price
-            tree.insert('', 'end', values=(
-                product_name,
-                f"${price:.2f}",
-                quantity,
-                f"{discount*100:.0f}%",
-                f"${discounted_price:.2f}",
-                f"${total:.2f}"
-            ))
-        
-        tree.pack(expand=True, fill=tk.BOTH)
-        
-        total_label = ttk.Label(bill_frame, text=f"Total Price: ${self.total_price:.2f}", font=('Helvetica', 14, 'bold'))
-        total_label.pack(pady=10)
-        
-        proceed_button = ttk.Button(bill_frame, text="Proceed to Payment", command=lambda: [bill_window.destroy(), self.open_payment_window()])
-        proceed_button.pack(pady=10)
-        
-        # Adjust window size to fit content
-        bill_window.update()
-        window_width = tree.winfo_width()   # Add some padding
-        window_height = bill_frame.winfo_height()   # Add some padding
-        bill_window.geometry(f"{window_width}x{window_height}")
-    
-    def open_payment_window(self):
-        self.payment_window = tk.Toplevel(self.master)
-        self.payment_window.title("Payment")
-        self.payment_window.geometry("400x300")
-        
-        ttk.Label(self.payment_window, text=f"Total Price: ${self.total_price:.2f}", font=('Helvetica', 16)).pack(pady=10)
-        ttk.Label(self.payment_window, text="Enter Amount:").pack(pady=5)
-        
-        self.amount_entry = ttk.Entry(self.payment_window, font=('Helvetica', 14))
-        self.amount_entry.pack(pady=5)
-        def open_virtual_keyboard():
-            root.destroy()
-            subprocess.run(['python','virtualkeyboard.py'])
-        ttk.Button(self.payment_window, text="Use Virtual Keyboard", command=self.open_virtual_keyboard).pack(pady=10)
-        ttk.Button(self.payment_window, text="Pay", command=self.process_payment).pack(pady=10)
+        if self.bill_view is None:
+            self.bill_view = BillView(self.master, self.cart, self.open_payment_window)
+        self.bill_view.show()
     
     def process_payment(self):
         try:
-            entered_amount = float(self.amount_entry.get())
-            if entered_amount >= self.total_price:
-                change = entered_amount - self.total_price
-                self.payment_window.destroy()
-                self.show_thank_you(change)
-            else:
-                messagebox.showwarning("Payment", "Insufficient balance. Please try again.")
+            payment = self.checkout.pay(self.amount_entry.get())
         except ValueError:
             messagebox.showwarning("Payment", "Invalid amount entered. Please enter a valid number.")
+            return
+        if payment.paid:
+            self.payment_window.destroy()
+            self.show_thank_you(payment.change_cents)
+        else:
+            messagebox.showwarning("Payment", "Insufficient balance. Please try again.")
+    
     def open_payment_window(self):
         self.payment_window = tk.Toplevel(self.master)
         self.payment_window.title("Payment")
         self.payment_window.geometry("400x200")
         
-        ttk.Label(self.payment_window, text=f"Total Price: ${self.total_price:.2f}", font=('Helvetica', 16)).pack(pady=20)
+        ttk.Label(self.payment_window, text=f"Total Price: {format_cents(self.cart.total_cents)}", font=('Helvetica', 16)).pack(pady=20)
+        # Build the QR code while the customer chooses how to pay
+        if self.qr_pool:
+            self.qr_pool.prepare(self.cart.total_cents)
         
         ttk.Button(self.payment_window, text="Pay Cash", command=self.process_cash_payment).pack(pady=10)
         ttk.Button(self.payment_window, text="Pay with QR Code", command=self.show_qr_code).pack(pady=10)
@@ -271,34 +335,39 @@ class SelfCheckoutSystem:
         
         ttk.Label(qr_window, text="Scan QR Code to Pay", font=('Helvetica', 18, 'bold')).pack(pady=20)
         
-        # Load the QR code image from the specified path
-        qr_path = r"V:/VIT/Project/Self checkout machine virtual keyboard with opencv/SelfCheckoutMachine/qr_codes/ZDRlPMXIz63X.png"
-        qr_image = Image.open(qr_path)
-        qr_image = qr_image.resize((200, 200), Image.LANCZOS)
-        qr_photo = ImageTk.PhotoImage(qr_image)
+        # Already rendered at display size for this total, with a payment id of its own
+        code = self.get_qr_pool().take(self.cart.total_cents)
+        qr_photo = ImageTk.PhotoImage(code.image)
         
         # Display the QR code image
         qr_label = ttk.Label(qr_window, image=qr_photo)
         qr_label.image = qr_photo
         qr_label.pack(pady=10)
         
-        ttk.Label(qr_window, text=f"Amount: ${self.total_price:.2f}", font=('Helvetica', 14)).pack(pady=10)
-        ttk.Button(qr_window, text="Confirm Payment", command=lambda: self.show_thank_you(0, qr_window)).pack(pady=10)
+        ttk.Label(qr_window, text=f"Amount: {format_cents(code.amount_cents)}", font=('Helvetica', 14)).pack(pady=10)
+        ttk.Label(qr_window, text=f"Payment ID: {code.payment_id}").pack()
+        ttk.Button(qr_window, text="Confirm Payment", command=lambda: self.confirm_qr_payment(qr_window)).pack(pady=10)
 
     
-    def show_thank_you(self, change):
-        thank_you_window = tk.Toplevel(self.master)
-        thank_you_window.title("Thank You!")
-        thank_you_window.geometry("400x200")
-        
-        ttk.Label(thank_you_window, text="Thank you! Visit again!", font=('Helvetica', 18, 'bold')).pack(pady=20)
-        ttk.Label(thank_you_window, text=f"Your change: ${change:.2f}", font=('Helvetica', 14)).pack(pady=10)
-        ttk.Button(thank_you_window, text="Close", command=self.reset_checkout).pack(pady=10)
-    
+    def confirm_qr_payment(self, qr_window):
+        payment = self.checkout.pay()
+        self.show_thank_you(payment.change_cents, qr_window)
     
     def process_cash_payment(self):
-        self.payment_window.destroy()
-        self.show_thank_you(0)
+        for widget in self.payment_window.winfo_children():
+            widget.destroy()
+        self.payment_window.title("Cash Payment")
+        self.payment_window.geometry("400x300")
+        
+        ttk.Label(self.payment_window, text=f"Total Price: {format_cents(self.cart.total_cents)}", font=('Helvetica', 16)).pack(pady=10)
+        ttk.Label(self.payment_window, text="Enter Amount:").pack(pady=5)
+        
+        self.amount_entry = ttk.Entry(self.payment_window, font=('Helvetica', 14))
+        self.amount_entry.pack(pady=5)
+        if self.gesture_keyboard:
+            ttk.Button(self.payment_window, text="Use Gesture Keyboard", command=self.open_gesture_keyboard).pack(pady=5)
+        ttk.Button(self.payment_window, text="Use Virtual Keyboard", command=self.open_virtual_keyboard).pack(pady=5)
+        ttk.Button(self.payment_window, text="Pay", command=self.process_payment).pack(pady=5)
 
     def show_thank_you(self, change, previous_window=None):
         if previous_window:
@@ -310,20 +379,76 @@ class SelfCheckoutSystem:
         
         ttk.Label(thank_you_window, text="Thank you! Visit again!", font=('Helvetica', 18, 'bold')).pack(pady=20)
         if change > 0:
-            ttk.Label(thank_you_window, text=f"Your change: ${change:.2f}", font=('Helvetica', 14)).pack(pady=10)
+            ttk.Label(thank_you_window, text=f"Your change: {format_cents(change)}", font=('Helvetica', 14)).pack(pady=10)
         ttk.Button(thank_you_window, text="Close", command=self.reset_checkout).pack(pady=10)
 
     
     def reset_checkout(self):
-        self.scanned_products = []
-        self.total_price = 0
+        self.checkout.reset()
         self.update_info_labels()
         self.master.focus_set()
     
+    def close(self):
+        self.stop_gesture_keyboard()
+        if self.pipeline:
+            self.pipeline.stop()
+        if self.qr_pool:
+            self.qr_pool.close()
+        if self.cap is not None:
+            self.cap.release()
+        if self.low_confidence:
+            self.low_confidence.close()
+            print(f"Low-confidence frames: {self.low_confidence.stats()}")
+        print(f"Recognition: {self.checkout.stats()}")
+        self.master.destroy()
+    
+    def open_gesture_keyboard(self):
+        self.keyboard_window = tk.Toplevel(self.master)
+        self.keyboard_window.title("Gesture Keyboard")
+        self.final_text = ""
+        
+        self.text_box = ttk.Entry(self.keyboard_window, font=('Helvetica', 18))
+        self.text_box.pack(pady=10, padx=10, fill=tk.X)
+        gesture_label = ttk.Label(self.keyboard_window)
+        gesture_label.pack(pady=10)
+        self.gesture_display = FrameDisplay(gesture_label, DISPLAY_FPS)
+        
+        # Same camera as the checkout view: subscribe to its raw frames instead of opening it again
+        self.stop_gesture_keyboard()
+        frames = LatestFrameQueue()
+        self.frame_subscribers.append(frames)
+        session = self.gesture_session = GestureKeyboardSession(self.gesture_keyboard, frames)
+        window = self.keyboard_window
+        window.bind("<Destroy>", lambda event: event.widget is window and self.stop_gesture_keyboard(session))
+        self.poll_gesture_keyboard()
+    
+    def poll_gesture_keyboard(self):
+        session = self.gesture_session
+        if session is None:
+            return
+        frame = session.display.get_nowait()
+        if frame is not None:
+            self.gesture_display.show(frame, rgb=True)
+        while not session.keys.empty() and self.gesture_session is session:
+            self.update_text_box(session.keys.get())
+        if self.gesture_session is session:
+            self.master.after(15, self.poll_gesture_keyboard)
+    
+    def stop_gesture_keyboard(self, session=None):
+        session = session or self.gesture_session
+        if session is None or not session.running:
+            return
+        if session is self.gesture_session:
+            self.gesture_session = None
+        if session.frames in self.frame_subscribers:
+            self.frame_subscribers.remove(session.frames)
+        session.stop()
+    
     def open_virtual_keyboard(self):
         self.keyboard_window = tk.Toplevel(self.master)
         self.keyboard_window.title("Virtual Keyboard")
         self.keyboard_window.geometry("600x500")
+        self.final_text = ""
         
         self.text_box = ttk.Entry(self.keyboard_window, font=('Helvetica', 18))
         self.text_box.pack(pady=10, padx=10, fill=tk.X)
@@ -335,23 +460,16 @@ class SelfCheckoutSystem:
         self.keyboard_canvas.bind("<Button-1>", self.on_keyboard_click)
     
     def draw_keyboard(self):
-        x_start = PADDING
-        y_start = PADDING
-        for row in KEYBOARD_KEYS:
-            x = x_start
-            for key in row:
-                color = "#DDDDDD" if key not in ["Delete", "Enter"] else "#BBBBBB"
-                self.keyboard_canvas.create_rectangle(x, y_start, x + KEY_WIDTH, y_start + KEY_HEIGHT, fill=color, outline="black")
-                self.keyboard_canvas.create_text(x + KEY_WIDTH // 2, y_start + KEY_HEIGHT // 2, text=key, font=('Helvetica', 14, 'bold'))
-                x += KEY_WIDTH + X_GAP
-            y_start += KEY_HEIGHT + Y_GAP
+        self.keypad = get_keypad(KEYBOARD_KEYS, (600, 400), KEY_WIDTH, KEY_HEIGHT, X_GAP, Y_GAP, PADDING, origin=(0, 0))
+        for key in self.keypad.keys:
+            color = "#DDDDDD" if key.label not in ["Delete", "Enter"] else "#BBBBBB"
+            self.keyboard_canvas.create_rectangle(key.x0, key.y0, key.x1, key.y1, fill=color, outline="black")
+            self.keyboard_canvas.create_text(key.cx, key.cy, text=key.label, font=('Helvetica', 14, 'bold'))
     
     def on_keyboard_click(self, event):
-        row = (event.y - PADDING) // (KEY_HEIGHT + Y_GAP)
-        col = (event.x - PADDING) // (KEY_WIDTH + X_GAP)
-        if 0 <= row < len(KEYBOARD_KEYS) and 0 <= col < len(KEYBOARD_KEYS[row]):
-            key = KEYBOARD_KEYS[row][col]
-            self.update_text_box(key)
+        key = self.keypad.key_at(event.x, event.y)
+        if key is not None:
+            self.update_text_box(key.label)
     
     def update_text_box(self, text):
         if text == "Delete":
@@ -360,6 +478,7 @@ class SelfCheckoutSystem:
             self.amount_entry.delete(0, tk.END)
             self.amount_entry.insert(tk.END, self.final_text)
             self.keyboard_window.destroy()
+            return
         else:
             self.final_text += text
         self.text_box.delete(0, tk.END)
@@ -368,4 +487,5 @@ class SelfCheckoutSystem:
 if __name__ == "__main__":
     root = tk.Tk()
     app = SelfCheckoutSystem(root)
+    root.protocol("WM_DELETE_WINDOW", app.close)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,78 @@
+import pytest
+
+from cart import Cart, format_cents, to_cents
+
+
+def product(sku, price, discount=0):
+    return {'sku': sku, 'name': f"Product {sku}", 'price': price, 'discount': discount}
+
+
+@pytest.mark.parametrize("amount, cents", [
+    (0.1, 10),
+    ("19.99", 1999),
+    (" $5 ", 500),
+    (1.005, 101),
+    ("0.015", 2),
+    (2.675, 268),
+])
+def test_to_cents_rounds_half_up(amount, cents):
+    assert to_cents(amount) == cents
+
+
+@pytest.mark.parametrize("amount", ["", "abc", "1.2.3", "nan", "inf"])
+def test_to_cents_rejects_invalid_amounts(amount):
+    with pytest.raises(ValueError):
+        to_cents(amount)
+
+
+def test_format_cents():
+    assert format_cents(0) == "$0.00"
+    assert format_cents(1999) == "$19.99"
+    assert format_cents(-5) == "$-0.05"
+
+
+def test_discount_is_rounded_per_unit():
+    cart = Cart()
+    line = cart.add(product(1, 0.99, 0.15))
+    # 99 * 0.85 = 84.15
+    assert line.discounted_cents == 84
+    cart.add(product(1, 0.99, 0.15))
+    cart.add(product(1, 0.99, 0.15))
+    assert line.quantity == 3
+    assert cart.total_cents == 3 * 84
+
+
+def test_float_prices_add_up_exactly():
+    cart = Cart()
+    for _ in range(10):
+        cart.add(product(1, 0.1))
+    cart.add(product(2, 0.2))
+    assert cart.total_cents == 120
+    assert len(cart) == 11
+    assert cart.line_count == 2
+
+
+def test_undo_and_remove_keep_totals():
+    cart = Cart()
+    cart.add(product(1, 1.50))
+    cart.add(product(2, 2.25))
+    cart.add(product(1, 1.50))
+    cart.remove(1)
+    assert cart.total_cents == 375
+    # The remaining scan of SKU 1 is older than SKU 2's
+    assert cart.undo().sku == 2
+    assert cart.undo().sku == 1
+    assert cart.undo() is None
+    assert cart.total_cents == 0
+    assert cart.line_count == 0
+    assert cart.remove(1) is None
+
+
+def test_listeners_and_clear():
+    cart = Cart()
+    changes = []
+    cart.listeners.append(changes.append)
+    cart.add(product(7, 3))
+    cart.clear()
+    assert changes == [7, None]
+    assert cart.total_cents == 0 and len(cart) == 0
@@ -0,0 +1,90 @@
+import pytest
+
+from recognition import TemporalVoter
+
+SURE_A = [0.96, 0.02, 0.02]
+SURE_B = [0.02, 0.96, 0.02]
+UNSURE_A = [0.6, 0.3, 0.1]
+EMPTY = [0.34, 0.33, 0.33]
+
+
+def feed(voter, predictions):
+    return [voter.update(p) for p in predictions]
+
+
+def test_mean_needs_min_agree_frames():
+    voter = TemporalVoter(window=5, min_agree=3, threshold=0.9)
+    assert feed(voter, [SURE_A] * 4) == [None, None, 0, 0]
+
+
+def test_mean_averages_over_the_window():
+    voter = TemporalVoter(window=3, min_agree=2, threshold=0.9)
+    # One weak frame pulls the mean below the threshold until it leaves the window
+    assert feed(voter, [SURE_A, SURE_A, UNSURE_A, SURE_A, SURE_A, SURE_A]) == [None, 0, None, None, None, 0]
+
+
+def test_majority_counts_confident_top1_frames():
+    voter = TemporalVoter(window=5, min_agree=3, threshold=0.9, mode="majority")
+    # Unsure frames do not vote, but do not reset the count either
+    assert feed(voter, [SURE_A, UNSURE_A, SURE_A, SURE_B, SURE_A]) == [None, None, None, None, 0]
+
+
+def test_majority_forgets_frames_outside_the_window():
+    voter = TemporalVoter(window=3, min_agree=2, threshold=0.9, mode="majority")
+    assert feed(voter, [SURE_A, SURE_A, SURE_B, SURE_B, SURE_B]) == [None, 0, 0, 1, 1]
+
+
+def test_min_agree_is_capped_at_window():
+    voter = TemporalVoter(window=2, min_agree=5, threshold=0.9)
+    assert voter.min_agree == 2
+    assert feed(voter, [SURE_A] * 2) == [None, 0]
+
+
+def test_just_confirmed_only_on_a_new_class():
+    voter = TemporalVoter(window=2, min_agree=2, threshold=0.9)
+    flags = []
+    for p in [SURE_A, SURE_A, SURE_A, EMPTY, EMPTY, SURE_A, SURE_A]:
+        voter.update(p)
+        flags.append(voter.just_confirmed)
+    # Confirmed once, lost while the item is away, confirmed again when it is shown again
+    assert flags == [False, True, False, False, False, False, True]
+
+
+def test_flicker_while_present_confirms_once():
+    voter = TemporalVoter(5, 3, 0.92)
+    confirmations = 0
+    # One unsure frame drops the vote below the threshold, but the item never left
+    for p in [SURE_A] * 5 + [UNSURE_A] + [SURE_A] * 6:
+        voter.update(p)
+        confirmations += voter.just_confirmed
+    assert voter.confirmed == 0
+    assert confirmations == 1
+
+
+def test_new_class_is_confirmed_without_leaving():
+    voter = TemporalVoter(window=2, min_agree=2, threshold=0.9)
+    flags = []
+    for p in [SURE_A, SURE_A, SURE_B, SURE_B]:
+        voter.update(p)
+        flags.append(voter.just_confirmed)
+    assert flags == [False, True, False, True]
+
+
+def test_confirm_time_is_measured_from_presentation():
+    voter = TemporalVoter(window=2, min_agree=2, threshold=0.9)
+    assert feed(voter, [EMPTY, SURE_A, SURE_A]) == [None, None, 0]
+    assert voter.just_confirmed
+    assert voter.last_confirm_seconds is not None and voter.last_confirm_seconds >= 0
+
+
+def test_reset_forgets_the_confirmed_class():
+    voter = TemporalVoter(window=3, min_agree=2, threshold=0.9)
+    feed(voter, [SURE_A, SURE_A])
+    voter.reset()
+    assert voter.confirmed is None
+    assert feed(voter, [SURE_A]) == [None]
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        TemporalVoter(mode="median")
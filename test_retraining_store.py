@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+
+from catalog import Catalog, build_catalog
+from retraining_store import LowConfidenceStore, export, frame_name, parse_name
+
+
+def test_names_round_trip_labels_with_separators():
+    name = frame_name(1.5, 3, [("SKU_1-a+b=c", 0.5), (None, 0.3), (7, 0.2)])
+    assert parse_name(name) == [("SKU_1-a+b=c", 0.5), (None, 0.3), ("7", 0.2)]
+
+
+def test_export_uses_catalog_without_class_index(tmp_path):
+    csv_path = tmp_path / "products.csv"
+    csv_path.write_text("Product_ID,Product_Name,Price,Discount\n"
+                        "1001,Mineral Water,$2,10%\n"
+                        "1002,Manggo,$5,0%\n"
+                        "1003,Chips,$3,0%\n")
+    db_path = str(tmp_path / "products.sqlite")
+    build_catalog(str(csv_path), db_path)
+    # No .classes.json: classes follow the CSV row order, looked up by rowid
+    catalog = Catalog(db_path)
+
+    store = LowConfidenceStore(str(tmp_path / "store"), min_interval=0, flush_interval=0.01)
+    assert store.offer(np.zeros((60, 80, 3), np.uint8), np.array([0.2, 0.5, 0.3], np.float32),
+                       catalog.sku_for_class)
+    store.close()
+    catalog.close()
+
+    out_dir = tmp_path / "export"
+    assert export(str(tmp_path / "store"), str(out_dir)) == {"1002": 1}
+    assert len(os.listdir(out_dir / "1002")) == 1
+    assert (out_dir / "predictions.csv").exists()
+
+
+def test_export_skips_unmapped_classes(tmp_path):
+    store = LowConfidenceStore(str(tmp_path / "store"), min_interval=0, flush_interval=0.01)
+    store.offer(np.zeros((60, 80, 3), np.uint8), [0.6, 0.4], {1: "1002"}.get)
+    store.close()
+    assert export(str(tmp_path / "store"), str(tmp_path / "export")) == {}
+    assert not (tmp_path / "export" / "None").exists()
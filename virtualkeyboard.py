@@ -2,9 +2,9 @@ import cv2
 import mediapipe as mp
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
-import numpy as np
-import time
+from gesture_keyboard import GestureKeyboard
+from display import FrameDisplay
+from metrics import Metrics
 
 # Keyboard layout
 keyboard_keys = [
@@ -21,49 +21,27 @@ x_gap = 30
 y_gap = 22
 padding = 15
 
+# Hand tracking: downscale factor for the MediaPipe input, and margin in pixels around
+# the keypad to crop to (None runs on the whole frame)
+tracking_scale = 0.5
+tracking_roi_margin = 60
+# Run MediaPipe at most every N frames and predict the fingertip in between (1 = every frame)
+detection_interval = 3
+# Upper bound on how often the camera preview is redrawn
+display_fps = 30
+# Stage timings: draw p50/p95/p99 on the video, and/or export them for Prometheus
+# as a textfile or on http://127.0.0.1:<port>/metrics
+metrics_overlay = False
+metrics_textfile = None
+metrics_port = None
+metrics = Metrics()
+metrics.start_export(metrics_textfile, metrics_port)
+
 # Initialize MediaPipe for hand detection
 mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
 hands = mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.9, min_tracking_confidence=0.9)
-
-# Draw keyboard on the frame
-def draw_keyboard(frame):
-    global x_start, y_start
-    frame_height, frame_width, _ = frame.shape
-    rows = len(keyboard_keys)
-    cols = max(len(row) for row in keyboard_keys)
-    total_width = cols * key_width + (cols - 1) * x_gap + 2 * padding
-    total_height = rows * key_height + (rows - 1) * y_gap + 2 * padding
-    x_start = (frame_width - total_width) // 2
-    y_start = (frame_height - total_height) // 2
-    overlay = frame.copy()
-    y = y_start + padding
-    for row in keyboard_keys:
-        x = x_start + padding
-        for key in row:
-            color = (200, 200, 200) if key not in ["Delete", "Enter"] else (150, 150, 150)
-            cv2.rectangle(overlay, (x, y), (x + key_width, y + key_height), color, -1)
-            cv2.putText(overlay, key, (x + key_width // 4, y + key_height // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
-            x += key_width + x_gap
-        y += key_height + y_gap
-    alpha = 0.5
-    cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
-
-# Get key based on hand coordinates
-def get_key_from_coords(x, y, frame):
-    global x_start, y_start
-    frame_height, frame_width, _ = frame.shape
-    rows = len(keyboard_keys)
-    cols = max(len(row) for row in keyboard_keys)
-    total_width = cols * key_width + (cols - 1) * x_gap + 2 * padding
-    total_height = rows * key_height + (rows - 1) * y_gap + 2 * padding
-    x_start = (frame_width - total_width) // 2
-    y_start = (frame_height - total_height) // 2
-    row = (y - y_start - padding) // (key_height + y_gap)
-    col = (x - x_start - padding) // (key_width + x_gap)
-    if 0 <= row < len(keyboard_keys) and 0 <= col < len(keyboard_keys[row]):
-        return row, col
-    return None, None
+keyboard = GestureKeyboard(hands, keyboard_keys, key_width, key_height, x_gap, y_gap, padding,
+                           tracking_scale, tracking_roi_margin, detection_interval, metrics=metrics)
 
 # Update text box with detected key
 def update_text_box(text):
@@ -86,45 +64,30 @@ text_box = ttk.Entry(root, font=('Helvetica', 24))
 text_box.pack(pady=10, padx=10, fill=tk.X)
 webcam_label = tk.Label(root)
 webcam_label.pack()
+display = FrameDisplay(webcam_label, display_fps, metrics)
 
 # Capture video
 cap = cv2.VideoCapture(0)
 final_text = ""
-last_key = None
-last_press_time = time.time()
 
 # Update video frame
 def update_frame():
-    global final_text, last_key, last_press_time, x_start, y_start
-    ret, frame = cap.read()
+    with metrics.time("capture"):
+        ret, frame = cap.read()
     if not ret:
         root.after(10, update_frame)
         return
-    draw_keyboard(frame)
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(frame_rgb)
-    if results.multi_hand_landmarks:
-        for hand_landmarks in results.multi_hand_landmarks:
-            x = int(hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP].x * frame.shape[1])
-            y = int(hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP].y * frame.shape[0])
-            mp_drawing.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-            row, col = get_key_from_coords(x, y, frame)
-            if row is not None and col is not None:
-                key = keyboard_keys[row][col]
-                cx = x_start + (col * (key_width + x_gap) + key_width // 2) + padding
-                cy = y_start + (row * (key_height + y_gap) + key_height // 2) + padding
-                l = np.sqrt((x - cx) ** 2 + (y - cy) ** 2)
-                if l <= 50 and (time.time() - last_press_time) > 0.2:
-                    if key != last_key:
-                        last_key = key
-                        update_text_box(key)
-                        print(f"Detected Key: {key}")
-                        last_press_time = time.time()
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    img = Image.fromarray(frame_rgb)
-    imgtk = ImageTk.PhotoImage(image=img)
-    webcam_label.imgtk = imgtk
-    webcam_label.configure(image=imgtk)
+    # The only colour conversion this frame: MediaPipe and the display share the RGB buffer,
+    # so the keypad and landmarks are drawn on it
+    frame_rgb = display.convert(frame)
+    key = keyboard.process(frame_rgb)
+    if key is not None:
+        update_text_box(key)
+        print(f"Detected Key: {key}")
+    if metrics_overlay:
+        metrics.draw_overlay(frame_rgb)
+    if display.due():
+        display.present()
     root.after(10, update_frame)
 
 # Start updating frames